@@ -0,0 +1,318 @@
+"""
+ANN Index - Approximate nearest-neighbour search over the embedding matrix (HNSW or IVF-flat)
+
+HNSW needs the optional hnswlib package; IVF-flat is plain numpy. Both work
+on unit vectors and score by inner product (= cosine similarity). The
+quantized indexes in quantization.py (int8, binary) share this interface
+and are saved and loaded through the same functions.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# Rows scored against the centroids at a time while assigning lists
+_ASSIGN_BLOCK = 65536
+
+# Index file suffix next to the embedding store, per kind
+_INDEX_SUFFIXES = {'hnsw': '.hnsw', 'ivf': '.ivf.npz', 'int8': '.int8.npz', 'binary': '.binary.npz'}
+
+
+def matrix_hash(matrix):
+    """SHA-256 of the matrix bytes; an index is only used with the matrix it was built from"""
+    return hashlib.sha256(np.ascontiguousarray(matrix, dtype=np.float32).data).hexdigest()
+
+
+def top_k(scores, k):
+    """Column indices of the k highest scores per row, best first"""
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1)
+
+
+class IVFFlatIndex:
+    kind = 'ivf'
+
+    def __init__(self, nlist=None, nprobe=8):
+        """
+        Initialize inverted-file index
+
+        Rows are clustered around nlist centroids (spherical k-means); a
+        query scores every row of its nprobe closest lists exactly.
+
+        Args:
+            nlist: Number of lists (default: 4 * sqrt(rows))
+            nprobe: Lists searched per query; more is slower and more exact
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroids = None
+        self.order = None    # row ids grouped by list
+        self.offsets = None  # list i holds order[offsets[i]:offsets[i + 1]]
+        self.matrix = None
+        self.fingerprint = None
+
+    def build(self, matrix, iterations=10, sample=100000, seed=0):
+        """
+        Cluster the rows and build the inverted lists
+
+        Args:
+            matrix: (rows, dim) unit vectors
+            iterations: k-means iterations
+            sample: Rows used to train the centroids
+            seed: Random seed
+        """
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        rng = np.random.default_rng(seed)
+        nlist = min(self.nlist or max(1, int(4 * np.sqrt(len(matrix)))), len(matrix))
+
+        train = matrix
+        if len(matrix) > sample:
+            train = matrix[np.sort(rng.choice(len(matrix), sample, replace=False))]
+
+        centroids = train[rng.choice(len(train), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = self._assign(train, centroids)
+            order = np.argsort(assignment, kind='stable')
+            counts = np.bincount(assignment, minlength=nlist)
+            filled = counts > 0
+
+            # Per-list sums over the rows sorted by list
+            sums = np.zeros_like(centroids)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            sums[filled] = np.add.reduceat(train[order], starts[filled], axis=0)
+
+            # Lists that lost every row restart from a random training row
+            empty = ~filled
+            sums[empty] = train[rng.choice(len(train), int(empty.sum()))]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+        assignment = self._assign(matrix, centroids)
+        self.nlist = nlist
+        self.centroids = centroids.astype(np.float32)
+        self.order = np.argsort(assignment, kind='stable')
+        self.offsets = np.searchsorted(assignment[self.order], np.arange(nlist + 1))
+        self.matrix = matrix
+        self.fingerprint = matrix_hash(matrix)
+        return self
+
+    @staticmethod
+    def _assign(rows, centroids):
+        assignment = np.empty(len(rows), dtype=np.int64)
+        for start in range(0, len(rows), _ASSIGN_BLOCK):
+            block = rows[start:start + _ASSIGN_BLOCK]
+            assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return assignment
+
+    def search(self, queries, k=3, nprobe=None):
+        """
+        Approximate top-k by inner product
+
+        Args:
+            queries: (queries, dim) unit vectors
+            k: Results per query
+            nprobe: Lists to search (default: self.nprobe)
+
+        Returns:
+            tuple: (row indices, scores), each (queries, k) best first;
+                   -1 / -inf pad queries whose lists hold fewer than k rows
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.centroids.shape[1])
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        probes = top_k(queries @ self.centroids.T, nprobe)
+
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for q, lists in enumerate(probes):
+            rows = np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in lists])
+            row_scores = self.matrix[rows] @ queries[q]
+            top = top_k(row_scores[None, :], k)[0]
+            indices[q, :len(top)] = rows[top]
+            scores[q, :len(top)] = row_scores[top]
+        return indices, scores
+
+    def save(self, path):
+        """Write centroids and lists to an .npz file"""
+        np.savez(path, centroids=self.centroids, order=self.order, offsets=self.offsets,
+                 params=json.dumps({'nprobe': self.nprobe, 'fingerprint': self.fingerprint}))
+
+    @classmethod
+    def load(cls, path, matrix):
+        """Read an index saved by save(); matrix is the embedding matrix it indexes"""
+        with np.load(path) as data:
+            params = json.loads(str(data['params']))
+            index = cls(nlist=len(data['centroids']), nprobe=params['nprobe'])
+            index.centroids = data['centroids']
+            index.order = data['order']
+            index.offsets = data['offsets']
+        index.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        index.fingerprint = params['fingerprint']
+        return index
+
+
+class HNSWIndex:
+    kind = 'hnsw'
+
+    def __init__(self, m=16, ef_construction=200, ef=64, threads=-1):
+        """
+        Initialize HNSW graph index (requires hnswlib)
+
+        Args:
+            m: Graph links per node; more is larger, slower to build, more exact
+            ef_construction: Candidate list size while building
+            ef: Candidate list size per query; more is slower and more exact
+            threads: Build/query threads (-1: all cores)
+        """
+        import hnswlib  # noqa: F401 (fail early if missing)
+
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef = ef
+        self.threads = threads
+        self.graph = None
+        self.fingerprint = None
+
+    def build(self, matrix, seed=0):
+        """
+        Insert every row into the graph
+
+        Args:
+            matrix: (rows, dim) unit vectors
+            seed: Random seed for level assignment
+        """
+        import hnswlib
+
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.graph = hnswlib.Index(space='ip', dim=matrix.shape[1])
+        self.graph.init_index(max_elements=len(matrix), M=self.m,
+                              ef_construction=self.ef_construction, random_seed=seed)
+        self.graph.add_items(matrix, np.arange(len(matrix)), num_threads=self.threads)
+        self.fingerprint = matrix_hash(matrix)
+        return self
+
+    def search(self, queries, k=3, ef=None):
+        """
+        Approximate top-k by inner product
+
+        Args:
+            queries: (queries, dim) unit vectors
+            k: Results per query
+            ef: Candidate list size (default: self.ef; raised to k if lower)
+
+        Returns:
+            tuple: (row indices, scores), each (queries, k) best first
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.graph.dim)
+        k = min(k, self.graph.get_current_count())
+        self.graph.set_ef(max(ef or self.ef, k))
+        labels, distances = self.graph.knn_query(queries, k=k, num_threads=self.threads)
+        # hnswlib's 'ip' distance is 1 - inner product
+        return labels.astype(np.int64), (1 - distances).astype(np.float32)
+
+    def save(self, path):
+        """Write the graph, with parameters in a .json file next to it"""
+        self.graph.save_index(path)
+        with open(path + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'m': self.m, 'ef_construction': self.ef_construction, 'ef': self.ef,
+                       'fingerprint': self.fingerprint}, f)
+
+    @classmethod
+    def load(cls, path, matrix):
+        """Read an index saved by save(); matrix is the embedding matrix it indexes"""
+        import hnswlib
+
+        with open(path + '.json', 'r', encoding='utf-8') as f:
+            params = json.load(f)
+        index = cls(m=params['m'], ef_construction=params['ef_construction'], ef=params['ef'])
+        index.graph = hnswlib.Index(space='ip', dim=matrix.shape[1])
+        index.graph.load_index(path, max_elements=len(matrix))
+        index.fingerprint = params['fingerprint']
+        return index
+
+
+def index_path(store_file, kind):
+    """Index file next to the embedding store (data/embeddings.bin -> data/embeddings.ivf.npz)"""
+    return os.path.splitext(store_file)[0] + _INDEX_SUFFIXES[kind]
+
+
+def index_class(kind):
+    """Index class for a kind ('hnsw', 'ivf', 'int8', 'binary')"""
+    if kind in ('int8', 'binary'):
+        from quantization import BinaryIndex, Int8Index
+        return Int8Index if kind == 'int8' else BinaryIndex
+    if kind not in _INDEX_SUFFIXES:
+        raise ValueError(f"Unknown index kind: {kind}")
+    return HNSWIndex if kind == 'hnsw' else IVFFlatIndex
+
+
+def build_index(matrix, kind='auto', **params):
+    """
+    Build an ANN or quantized index over unit vectors
+
+    Args:
+        matrix: (rows, dim) unit vectors
+        kind: 'hnsw', 'ivf', 'int8', 'binary', or 'auto' (HNSW if hnswlib
+              is installed, else IVF-flat)
+        params: Index parameters (m, ef_construction, ef / nlist, nprobe /
+                oversample, rescore)
+
+    Returns:
+        Index of the requested kind
+    """
+    if kind == 'auto':
+        try:
+            import hnswlib  # noqa: F401
+            kind = 'hnsw'
+        except ImportError:
+            print("⚠ hnswlib is not installed, using the numpy IVF-flat index")
+            kind = 'ivf'
+
+    return index_class(kind)(**params).build(matrix)
+
+
+def save_index(index, store_file):
+    """
+    Save an index next to the embedding store, removing any index of another kind
+
+    Returns:
+        str: Path written
+    """
+    path = index_path(store_file, index.kind)
+    index.save(path)
+
+    for kind in _INDEX_SUFFIXES:
+        stale = index_path(store_file, kind)
+        for leftover in (stale, stale + '.json'):
+            if kind != index.kind and os.path.exists(leftover):
+                os.remove(leftover)
+    return path
+
+
+def load_index(store_file, matrix):
+    """
+    Load the index saved next to the embedding store
+
+    Args:
+        store_file: Embedding store the index was saved beside
+        matrix: The store's (unit) matrix
+
+    Returns:
+        The saved index, or None if there is none, it cannot be loaded, or
+        it was built from a different matrix
+    """
+    for kind in _INDEX_SUFFIXES:
+        path = index_path(store_file, kind)
+        if not os.path.exists(path):
+            continue
+        try:
+            index = index_class(kind).load(path, matrix)
+        except ImportError:
+            print(f"⚠ hnswlib is not installed, ignoring {path}")
+            continue
+        if index.fingerprint != matrix_hash(matrix):
+            print(f"⚠ {path} was built from other embeddings, ignoring it (rerun generate_embeddings.py --index)")
+            continue
+        return index
+    return None
@@ -0,0 +1,102 @@
+"""
+Benchmark - Recall@k vs latency of the ANN indexes (IVF-flat nprobe, HNSW ef) against exact search
+
+Uses data/embeddings.bin if present, otherwise synthetic clustered unit
+vectors (random directions plus noise around cluster centres, which is
+closer to real embeddings than uniform noise). Queries are perturbed rows.
+
+Usage: python bench_ann.py [rows] [k]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from ann_index import HNSWIndex, IVFFlatIndex
+from retrieval import load_matrix, normalize_rows
+
+DIM = 384
+QUERIES = 200
+
+
+def load_vectors(rows, rng):
+    if os.path.exists('data/embeddings.bin'):
+        matrix, _ = load_matrix('data/embeddings.bin')
+        return np.ascontiguousarray(matrix)
+
+    centres = normalize_rows(rng.standard_normal((max(rows // 50, 1), DIM), dtype=np.float32))
+    vectors = centres[rng.integers(len(centres), size=rows)]
+    vectors += 2.0 / np.sqrt(DIM) * rng.standard_normal((rows, DIM), dtype=np.float32)
+    return normalize_rows(vectors)
+
+
+def exact_top_k(matrix, queries, k):
+    scores = queries @ matrix.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [set(row) for row in top]
+
+
+def evaluate(search, queries, truth, k):
+    """Mean recall@k and per-query latency (ms) for one-query-at-a-time search"""
+    found = []
+    start = time.perf_counter()
+    for query in queries:
+        found.append(search(query[None, :], k)[0][0])
+    latency = (time.perf_counter() - start) * 1000 / len(queries)
+    recall = np.mean([len(truth_set & set(row)) / k for truth_set, row in zip(truth, found)])
+    return recall, latency
+
+
+def file_size(paths):
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path)) / 2**20
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rng = np.random.default_rng(0)
+
+    matrix = load_vectors(rows, rng)
+    picks = rng.choice(len(matrix), QUERIES, replace=False)
+    queries = normalize_rows(matrix[picks] + 0.3 / np.sqrt(matrix.shape[1])
+                             * rng.standard_normal((QUERIES, matrix.shape[1]), dtype=np.float32))
+    truth = exact_top_k(matrix, queries, k)
+    print(f"Rows: {len(matrix):,}  Dimension: {matrix.shape[1]}  Queries: {QUERIES}  k = {k}\n")
+
+    start = time.perf_counter()
+    for query in queries:
+        np.argpartition(-(matrix @ query), k - 1)[:k]
+    exact_ms = (time.perf_counter() - start) * 1000 / QUERIES
+    print(f"{'exact':18} recall@{k} 1.000  {exact_ms:8.3f} ms/query")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        ivf = IVFFlatIndex().build(matrix)
+        build = time.perf_counter() - start
+        ivf.save(os.path.join(tmp, 'index.ivf.npz'))
+        print(f"\nIVF-flat: nlist {ivf.nlist}, built in {build:.1f}s, "
+              f"{file_size([os.path.join(tmp, 'index.ivf.npz')]):.1f} MB on disk")
+        for nprobe in (1, 2, 4, 8, 16, 32, 64):
+            if nprobe > ivf.nlist:
+                break
+            recall, latency = evaluate(lambda q, k: ivf.search(q, k, nprobe=nprobe), queries, truth, k)
+            print(f"  nprobe {nprobe:<9} recall@{k} {recall:.3f}  {latency:8.3f} ms/query  "
+                  f"({exact_ms / latency:.1f}x exact)")
+
+        try:
+            start = time.perf_counter()
+            hnsw = HNSWIndex().build(matrix)
+        except ImportError:
+            print("\nHNSW: hnswlib is not installed (pip install hnswlib)")
+            sys.exit(0)
+        build = time.perf_counter() - start
+        hnsw_file = os.path.join(tmp, 'index.hnsw')
+        hnsw.save(hnsw_file)
+        print(f"\nHNSW: M {hnsw.m}, ef_construction {hnsw.ef_construction}, built in {build:.1f}s, "
+              f"{file_size([hnsw_file, hnsw_file + '.json']):.1f} MB on disk")
+        for ef in (16, 32, 64, 128, 256):
+            recall, latency = evaluate(lambda q, k: hnsw.search(q, k, ef=ef), queries, truth, k)
+            print(f"  ef {ef:<13} recall@{k} {recall:.3f}  {latency:8.3f} ms/query  "
+                  f"({exact_ms / latency:.1f}x exact)")
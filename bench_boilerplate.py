@@ -0,0 +1,52 @@
+"""
+Benchmark - Corpus size and embedding time with and without boilerplate stripping
+
+Usage: python bench_boilerplate.py [scraped_data file]
+"""
+import os
+import sys
+import time
+
+from page_store import iter_pages
+from process_documents import DocumentProcessor
+
+
+def corpus(input_file, strip_boilerplate):
+    processor = DocumentProcessor(dedupe=True, strip_boilerplate=strip_boilerplate)
+    chunks = list(processor.process_file(input_file))
+    return chunks, sum(len(chunk['content']) for chunk in chunks), processor.stats
+
+
+def embed_seconds(model, chunks):
+    start = time.perf_counter()
+    model.encode([chunk['content'] for chunk in chunks], batch_size=32, convert_to_numpy=True)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    input_file = sys.argv[1] if len(sys.argv) > 1 else 'data/scraped_data.jsonl'
+    if not os.path.exists(input_file):
+        input_file = 'data/scraped_data.json'
+
+    pages = sum(1 for _ in iter_pages(input_file))
+    plain_chunks, plain_chars, _ = corpus(input_file, strip_boilerplate=False)
+    clean_chunks, clean_chars, stats = corpus(input_file, strip_boilerplate=True)
+
+    print(f"Pages: {pages} ({input_file})")
+    print(f"Without stripping: {plain_chars:10,} chars  {len(plain_chunks):6,} chunks")
+    print(f"With stripping:    {clean_chars:10,} chars  {len(clean_chunks):6,} chunks")
+    print(f"Removed: {stats['boilerplate_chars']:,} boilerplate chars "
+          f"({1 - clean_chars / plain_chars:.1%} of chunk text), "
+          f"{len(plain_chunks) - len(clean_chunks)} chunks ({1 - len(clean_chunks) / len(plain_chunks):.1%})")
+
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        print("sentence-transformers not installed; embedding time scales with the chunk count above")
+        sys.exit(0)
+
+    model = SentenceTransformer('all-MiniLM-L6-v2')
+    model.encode(['warm up'])
+    plain_time = embed_seconds(model, plain_chunks)
+    clean_time = embed_seconds(model, clean_chunks)
+    print(f"Embedding time: {plain_time:.2f}s -> {clean_time:.2f}s ({1 - clean_time / plain_time:.1%} less)")
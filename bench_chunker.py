@@ -0,0 +1,94 @@
+"""
+Benchmark - Regex + binary-search chunker vs the original character-by-character search
+
+Usage: python bench_chunker.py [scraped_data file]
+"""
+import json
+import sys
+import time
+
+from page_store import iter_pages
+from process_documents import DocumentProcessor
+
+
+class LegacyDocumentProcessor(DocumentProcessor):
+    """The original chunk_text: scans back from `end` slicing each sentence ending"""
+
+    def chunk_text(self, text, metadata):
+        chunks = []
+        text = text.strip()
+        if len(text) == 0:
+            return chunks
+        if len(text) <= self.chunk_size:
+            chunks.append({'content': text, 'metadata': metadata})
+            return chunks
+
+        start = 0
+        while start < len(text):
+            end = start + self.chunk_size
+            if end < len(text):
+                sentence_ends = ['. ', '.\n', '! ', '!\n', '? ', '?\n']
+                best_break = end
+                for i in range(end, max(start + self.chunk_size // 2, start), -1):
+                    for ending in sentence_ends:
+                        if text[i:i+len(ending)] == ending:
+                            best_break = i + len(ending)
+                            break
+                    if best_break != end:
+                        break
+                end = best_break
+
+            chunk_text = text[start:end].strip()
+            if chunk_text:
+                chunks.append({
+                    'content': chunk_text,
+                    'metadata': {**metadata, 'chunk_index': len(chunks)}
+                })
+            start = end - self.chunk_overlap if end < len(text) else end
+        return chunks
+
+
+def chunk_all(processor, pages):
+    return [processor.chunk_text(page['content'], {'url': page['url'], 'title': page['title']})
+            for page in pages]
+
+
+def best_of(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    input_file = sys.argv[1] if len(sys.argv) > 1 else 'data/scraped_data.json'
+    pages = list(iter_pages(input_file))
+
+    # Identical output across the settings that exercise the edge cases
+    identical = True
+    for chunk_size, chunk_overlap in [(500, 50), (200, 20), (1000, 100), (64, 8), (7, 2)]:
+        new = chunk_all(DocumentProcessor(chunk_size, chunk_overlap), pages)
+        old = chunk_all(LegacyDocumentProcessor(chunk_size, chunk_overlap), pages)
+        same = json.dumps(new, ensure_ascii=False) == json.dumps(old, ensure_ascii=False)
+        identical &= same
+        print(f"chunk_size={chunk_size:4} overlap={chunk_overlap:3}: "
+              f"{sum(map(len, new)):6,} chunks, identical: {same}")
+
+    # Throughput on the scraped corpus and on one multi-megabyte page
+    corpus_mb = sum(len(page['content'].encode('utf-8')) for page in pages) / (1024 * 1024)
+    big_page = {'url': 'big', 'title': 'big', 'content': '\n'.join(page['content'] for page in pages) * 10}
+    big_mb = len(big_page['content'].encode('utf-8')) / (1024 * 1024)
+
+    for label, data, mb in [(f"{len(pages)} scraped pages", pages, corpus_mb),
+                            ("one concatenated page", [big_page], big_mb)]:
+        old_time, _ = best_of(lambda: chunk_all(LegacyDocumentProcessor(), data), repeat=3)
+        new_time, _ = best_of(lambda: chunk_all(DocumentProcessor(), data), repeat=3)
+        print(f"\n{label} ({mb:.2f} MB):")
+        print(f"Legacy chunker: {old_time * 1000:8.1f} ms  {mb / old_time:6.1f} MB/s")
+        print(f"Regex chunker:  {new_time * 1000:8.1f} ms  {mb / new_time:6.1f} MB/s")
+        print(f"Speedup: {old_time / new_time:.1f}x")
+
+    if not identical:
+        sys.exit(1)
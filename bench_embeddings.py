@@ -0,0 +1,85 @@
+"""
+Benchmark - Single-process encode in chunk order vs length-bucketed multi-process encode
+
+Each mode runs in its own subprocess so peak RSS is measured separately.
+
+Usage: python bench_embeddings.py [workers] [model_name]
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from page_store import iter_records
+from process_documents import DocumentProcessor
+
+
+def load_texts():
+    """Chunk texts from the knowledge base, or chunked from the scraped data"""
+    for path in ('data/knowledge_base.jsonl', 'data/knowledge_base.json'):
+        if os.path.exists(path):
+            return [chunk['content'] for chunk in iter_records(path)]
+    processor = DocumentProcessor()
+    return [chunk['content'] for chunk in processor.process_file('data/scraped_data.json')]
+
+
+def run_mode(mode, workers, output_file, model_name):
+    from generate_embeddings import EmbeddingGenerator
+
+    texts = load_texts()
+    generator = EmbeddingGenerator(model_name)
+    generator.model.encode(texts[:32])  # warm up
+
+    start = time.perf_counter()
+    if mode == 'single':
+        embeddings = generator.model.encode(texts, batch_size=32, convert_to_numpy=True)
+    else:
+        lengths = [len(ids) for ids in generator.model.tokenizer(texts)['input_ids']]
+        embeddings = generator.encode_bucketed(texts, lengths, batch_size=32, workers=workers)
+    elapsed = time.perf_counter() - start
+
+    np.save(output_file, embeddings)
+    # ru_maxrss is KiB on Linux; children = the largest pool worker
+    print(json.dumps({
+        'chunks': len(texts),
+        'seconds': elapsed,
+        'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'child_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    }))
+
+
+def measure(mode, workers, output_file, model_name):
+    result = subprocess.run(
+        [sys.executable, __file__, '--mode', mode, str(workers), output_file, model_name],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--mode':
+        run_mode(sys.argv[2], int(sys.argv[3]), sys.argv[4], sys.argv[5])
+        sys.exit(0)
+
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else min(os.cpu_count() or 1, 4)
+    model_name = sys.argv[2] if len(sys.argv) > 2 else 'all-MiniLM-L6-v2'
+    with tempfile.TemporaryDirectory() as tmp:
+        single = measure('single', 1, os.path.join(tmp, 'single.npy'), model_name)
+        bucketed = measure('bucketed', workers, os.path.join(tmp, 'bucketed.npy'), model_name)
+        a = np.load(os.path.join(tmp, 'single.npy'))
+        b = np.load(os.path.join(tmp, 'bucketed.npy'))
+
+    cosine = np.sum(a * b, axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+    n = single['chunks']
+    print(f"Chunks: {n:,}")
+    print(f"Single process, chunk order: {n / single['seconds']:8.1f} chunks/s  "
+          f"peak RSS {single['rss_mb']:,.0f} MB")
+    print(f"Bucketed, {workers} workers:       {n / bucketed['seconds']:8.1f} chunks/s  "
+          f"peak RSS {bucketed['rss_mb']:,.0f} MB + {bucketed['child_rss_mb']:,.0f} MB per worker")
+    print(f"Speedup: {single['seconds'] / bucketed['seconds']:.2f}x   "
+          f"Min cosine vs single: {cosine.min():.6f}")
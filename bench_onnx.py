@@ -0,0 +1,86 @@
+"""
+Benchmark - torch vs ONNX Runtime (fp32 and int8) embedding backends
+
+Each backend runs in a fresh subprocess, so startup time includes imports
+and model load. ONNX export/quantization happens once before timing.
+
+Usage: python bench_onnx.py [model_name]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench_embeddings import load_texts
+
+# Cosine similarity to the torch embeddings each backend must reach
+TOLERANCE = {'onnx': 0.9999, 'onnx-int8': 0.98}
+
+
+def run_backend(backend, model_name, output_file):
+    start = time.perf_counter()
+    from generate_embeddings import EmbeddingGenerator
+    generator = EmbeddingGenerator(model_name, backend=backend)
+    startup = time.perf_counter() - start
+
+    texts = load_texts()
+    generator.model.encode(texts[:32])  # warm up
+
+    start = time.perf_counter()
+    embeddings = generator.model.encode(texts, batch_size=32, convert_to_numpy=True)
+    elapsed = time.perf_counter() - start
+
+    np.save(output_file, embeddings)
+    print(json.dumps({'chunks': len(texts), 'startup': startup, 'seconds': elapsed}))
+
+
+def measure(backend, model_name, output_file):
+    result = subprocess.run(
+        [sys.executable, __file__, '--backend', backend, model_name, output_file],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--backend':
+        run_backend(sys.argv[2], sys.argv[3], sys.argv[4])
+        sys.exit(0)
+
+    model_name = sys.argv[1] if len(sys.argv) > 1 else 'all-MiniLM-L6-v2'
+
+    # One-time export and quantization, outside the timed runs
+    from onnx_backend import OnnxEmbedder
+    OnnxEmbedder(model_name, quantize=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        vectors = {}
+        for backend in ('torch', 'onnx', 'onnx-int8'):
+            path = os.path.join(tmp, f"{backend}.npy")
+            results[backend] = measure(backend, model_name, path)
+            vectors[backend] = np.load(path)
+
+    reference = vectors['torch']
+    n = results['torch']['chunks']
+    print(f"Chunks: {n:,}  Model: {model_name}")
+    ok = True
+    for backend, result in results.items():
+        line = (f"{backend:10} startup {result['startup']:5.2f}s  "
+                f"{n / result['seconds']:8.1f} chunks/s")
+        if backend != 'torch':
+            v = vectors[backend]
+            cosine = np.sum(v * reference, axis=1) / (
+                np.linalg.norm(v, axis=1) * np.linalg.norm(reference, axis=1))
+            passed = cosine.min() >= TOLERANCE[backend]
+            ok &= passed
+            line += (f"  cosine vs torch min {cosine.min():.5f} mean {cosine.mean():.5f} "
+                     f"(tolerance {TOLERANCE[backend]}: {'ok' if passed else 'FAIL'})")
+        print(line)
+
+    if not ok:
+        sys.exit(1)
@@ -0,0 +1,82 @@
+"""
+Benchmark - Retriever latency (matrix multiply + argpartition) at 1k, 100k and 1M chunks
+
+Random unit vectors stand in for embeddings; chunk URLs rotate over ten
+sections so the URL-prefix filter keeps a tenth of the rows. The
+one-vector-at-a-time cosine loop plus full sort that rag-client.js used is
+timed for comparison where it finishes in reasonable time.
+
+Usage: python bench_retrieval.py [sizes...]
+"""
+import sys
+import time
+
+import numpy as np
+
+from retrieval import Retriever
+
+DIM = 384
+SECTIONS = 10
+
+
+def make_retriever(n, rng):
+    vectors = rng.standard_normal((n, DIM), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    metadata = [{'url': f"https://example.edu/section{s}/page", 'title': f"Section {s}"}
+                for s in range(SECTIONS)]
+    chunks = [{'content': '', 'metadata': metadata[i % SECTIONS]} for i in range(n)]
+    return Retriever(vectors, chunks, normalized=True)
+
+
+def loop_search(matrix, query, top_k=3):
+    """rag-client.js: cosine per vector, an object per chunk, full sort"""
+    results = []
+    for i, vector in enumerate(matrix):
+        score = float(np.dot(query, vector) / (np.linalg.norm(query) * np.linalg.norm(vector)))
+        results.append({'index': i, 'score': score})
+    results.sort(key=lambda r: r['score'], reverse=True)
+    return results[:top_k]
+
+
+def latencies(fn, queries):
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        times.append(time.perf_counter() - start)
+    return np.array(times) * 1000
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [1_000, 100_000, 1_000_000]
+    rng = np.random.default_rng(0)
+
+    print(f"{'chunks':>10} {'p50 ms':>8} {'p95 ms':>8} {'batch32 ms/q':>13} "
+          f"{'prefix p50 ms':>14} {'loop+sort ms':>13}")
+    for n in sizes:
+        retriever = make_retriever(n, rng)
+        queries = rng.standard_normal((64, DIM), dtype=np.float32)
+        retriever.search(queries[:32])  # warm up
+
+        single = latencies(lambda q: retriever.search(q, top_k=3), queries)
+
+        start = time.perf_counter()
+        for i in range(0, len(queries), 32):
+            retriever.search(queries[i:i + 32], top_k=3)
+        batch = (time.perf_counter() - start) * 1000 / len(queries)
+
+        prefix = latencies(lambda q: retriever.search(q, top_k=3, url_prefix="https://example.edu/section3/"),
+                           queries)
+
+        # Check against brute force, and time the old approach where it is bearable
+        loop = '-'
+        if n <= 100_000:
+            start = time.perf_counter()
+            expected = loop_search(retriever.matrix, queries[0])
+            loop = f"{(time.perf_counter() - start) * 1000:13.1f}"
+            got = retriever.search(queries[0], top_k=3)
+            assert [r['index'] for r in got] == [r['index'] for r in expected]
+
+        print(f"{n:>10,} {np.percentile(single, 50):8.2f} {np.percentile(single, 95):8.2f} "
+              f"{batch:13.2f} {np.percentile(prefix, 50):14.2f} {loop:>13}")
+        del retriever
@@ -0,0 +1,115 @@
+"""
+Load test - Concurrent /search requests against retrieval_server.py: p50/p99 latency and QPS
+
+Each simulated client holds one keep-alive connection and sends queries
+back to back. Queries are opening sentences of knowledge base chunks.
+
+Usage: python bench_retrieval_server.py [--url http://127.0.0.1:8000] [--clients 32] [--requests 2000]
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from page_store import iter_records
+
+
+def load_queries(limit=500):
+    path = 'data/knowledge_base.jsonl'
+    try:
+        records = iter_records(path)
+        first = next(records)
+    except (FileNotFoundError, StopIteration):
+        path = 'data/knowledge_base.json'
+        records = iter_records(path)
+        first = next(records)
+
+    queries = []
+    for chunk in [first, *records]:
+        sentence = re.split(r'(?<=[.!?])\s', chunk['content'].strip(), maxsplit=1)[0][:200]
+        if sentence:
+            queries.append(sentence)
+        if len(queries) >= limit:
+            break
+    return queries
+
+
+async def request(reader, writer, host, method, path, payload=None):
+    """One HTTP/1.1 request on an open connection; returns (status, JSON body)"""
+    body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length)) if length else None
+
+
+async def client(host, port, queries, counter, total, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while counter[0] < total:
+            query = queries[counter[0] % len(queries)]
+            counter[0] += 1
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, host, 'POST', '/search', {'query': query, 'top_k': 3})
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def health(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return (await request(reader, writer, host, 'GET', '/health'))[1]
+    finally:
+        writer.close()
+
+
+async def run(url, clients, total):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    queries = load_queries()
+
+    before = await health(host, port)
+    counter, latencies, errors = [0], [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, queries, counter, total, latencies, errors)
+                           for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    after = await health(host, port)
+
+    ms = np.array(latencies) * 1000
+    batches = after['batches'] - before['batches']
+    print(f"Requests: {len(latencies):,} ok, {len(errors)} failed   Clients: {clients}")
+    print(f"QPS: {len(latencies) / elapsed:,.1f}")
+    print(f"Latency ms: p50 {np.percentile(ms, 50):.1f}  p90 {np.percentile(ms, 90):.1f}  "
+          f"p99 {np.percentile(ms, 99):.1f}  max {ms.max():.1f}")
+    if batches:
+        print(f"Server batches: {batches:,} (mean size {(after['requests'] - before['requests']) / batches:.1f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test retrieval_server.py")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--clients', type=int, default=32, help="Concurrent connections")
+    parser.add_argument('--requests', type=int, default=2000, help="Total /search requests")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.clients, args.requests))
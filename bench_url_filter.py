@@ -0,0 +1,156 @@
+"""
+Benchmark - URLFilter compiled matcher vs the original per-URL keyword loops,
+and streaming top-k selection vs a full sort
+
+Usage: python bench_url_filter.py [num_urls]
+"""
+import random
+import sys
+import time
+import tracemalloc
+from urllib.parse import urlparse
+
+from smart_scraper import load_config
+from url_filter import URLFilter
+
+
+class LegacyURLFilter:
+    """The original URLFilter: re-reads config lists and loops per URL"""
+
+    def __init__(self, base_url, config):
+        self.base_domain = urlparse(base_url).netloc
+        self.config = config
+
+    def is_valid_url(self, url):
+        parsed = urlparse(url)
+        if parsed.netloc != self.base_domain:
+            return False
+        exclude_ext = self.config.get('exclude_extensions', [])
+        if any(url.lower().endswith(ext) for ext in exclude_ext):
+            return False
+        exclude_keywords = self.config.get('exclude_keywords', [])
+        url_lower = url.lower()
+        if any(keyword in url_lower for keyword in exclude_keywords):
+            return False
+        include_keywords = self.config.get('include_keywords', [])
+        if include_keywords:
+            if not any(keyword in url_lower for keyword in include_keywords):
+                return False
+        return True
+
+    def calculate_priority(self, url, sitemap_priority=None, depth=0):
+        score = 0.0
+        if sitemap_priority is not None:
+            score += sitemap_priority * 50
+        path = urlparse(url).path.lower()
+        url_lower = url.lower()
+        if path in ['/', '/index.html', '/home/']:
+            score += 30
+        priority_keywords = self.config.get('priority_keywords', {
+            'high': ['admission', 'course', 'program', 'department', 'fee'],
+            'medium': ['faculty', 'research', 'facility', 'infrastructure', 'placement'],
+            'low': ['event', 'news', 'gallery', 'notice']
+        })
+        for priority_level, keywords in priority_keywords.items():
+            for keyword in keywords:
+                if keyword in url_lower:
+                    if priority_level == 'high':
+                        score += 20
+                    elif priority_level == 'medium':
+                        score += 10
+                    else:
+                        score += 5
+                    break
+        score -= depth * 5
+        return max(score, 0.0)
+
+    def filter_and_prioritize(self, urls):
+        filtered = [u for u in urls if self.is_valid_url(u['url'])]
+        return [{'url': u['url'], 'score': self.calculate_priority(u['url'], u.get('priority'))}
+                for u in filtered]
+
+
+def stream_urls(base_url, n, seed=42):
+    """Synthetic sitemap entries resembling a large university site, generated lazily"""
+    rng = random.Random(seed)
+    words = ['admission', 'course', 'department', 'faculty', 'news', 'event', 'gallery',
+             'notice', 'research', 'about', 'contact', 'login', 'tag', 'category', 'student',
+             'hostel', 'library', 'alumni', 'exam', 'result', 'fee', 'Program', 'page']
+    exts = ['', '', '', '', '.html', '.pdf', '.jpg', '/']
+    hosts = [base_url.rstrip('/')] * 9 + ['https://other.example.edu']
+    for i in range(n):
+        path = '/'.join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+        yield {
+            'url': f"{rng.choice(hosts)}/{path}-{i}{rng.choice(exts)}",
+            'priority': rng.choice([None, 0.3, 0.5, 0.8, 1.0])
+        }
+
+
+def make_urls(base_url, n, seed=42):
+    return list(stream_urls(base_url, n, seed))
+
+
+def legacy_prioritize(url_filter, urls, max_urls):
+    """The original prioritize_urls: dict per candidate, full sort, slice"""
+    scored_urls = []
+    for url_data in urls:
+        scored_urls.append({
+            'url': url_data['url'],
+            'score': url_filter.calculate_priority(url_data['url'], url_data.get('priority')),
+            'sitemap_priority': url_data.get('priority')
+        })
+    scored_urls.sort(key=lambda x: x['score'], reverse=True)
+    return scored_urls[:max_urls]
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def best_of(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    config = load_config('scraper_config.json')
+    filters = dict(config['filters'], priority_keywords=config['priority_keywords'])
+    base_url = config['base_url']
+    urls = make_urls(base_url, n)
+
+    legacy = LegacyURLFilter(base_url, filters)
+    compiled = URLFilter(base_url, filters)
+
+    legacy_time, legacy_result = best_of(lambda: legacy.filter_and_prioritize(urls))
+    compiled_time, compiled_result = best_of(lambda: compiled.score_urls(urls))
+
+    same = [(u['url'], u['score']) for u in legacy_result] == \
+           [(u['url'], u['score']) for u in compiled_result]
+
+    print(f"URLs: {n:,} ({len(compiled_result):,} pass filters)")
+    print(f"Legacy filter + score:   {legacy_time * 1000:8.1f} ms  ({n / legacy_time:,.0f} URLs/s)")
+    print(f"Compiled score_urls:     {compiled_time * 1000:8.1f} ms  ({n / compiled_time:,.0f} URLs/s)")
+    print(f"Speedup: {legacy_time / compiled_time:.1f}x   Identical results: {same}")
+
+    # Top-k selection over a stream (k = max_pages) vs dict-per-URL full sort
+    k = config.get('max_pages', 150)
+    unfiltered = URLFilter(base_url, {'priority_keywords': config['priority_keywords']})
+    sort_time, sort_peak = peak_memory(
+        lambda: legacy_prioritize(legacy, list(stream_urls(base_url, n)), k))
+    heap_time, heap_peak = peak_memory(
+        lambda: unfiltered.top_urls(stream_urls(base_url, n), k, check_valid=False))
+
+    print(f"\nTop {k} of {n:,} URLs (including URL generation):")
+    print(f"Full sort (list + dicts): {sort_time * 1000:8.1f} ms  peak {sort_peak / 1024:,.0f} KiB")
+    print(f"Streaming top-k heap:     {heap_time * 1000:8.1f} ms  peak {heap_peak / 1024:,.0f} KiB")
@@ -0,0 +1,88 @@
+"""
+Benchmark - Indented JSON vs binary (float32 / float16) embedding store: size, write and load time
+
+Uses data/embeddings.bin if present, otherwise random unit vectors for the
+knowledge base chunks (the formats do not care what the numbers are).
+
+Usage: python bench_vector_store.py [dim]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from page_store import iter_records
+from process_documents import DocumentProcessor
+from vector_store import read_vector_store, write_vector_store
+
+
+def load_chunks_and_vectors(dim):
+    if os.path.exists('data/embeddings.bin'):
+        vectors, sidecar = read_vector_store('data/embeddings.bin', mmap=False)
+        return sidecar['chunks'], vectors.astype(np.float32)
+
+    if os.path.exists('data/knowledge_base.jsonl'):
+        chunks = list(iter_records('data/knowledge_base.jsonl'))
+    else:
+        chunks = list(DocumentProcessor().process_file('data/scraped_data.json'))
+    vectors = np.random.default_rng(0).standard_normal((len(chunks), dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return chunks, vectors
+
+
+def timed(fn, repeat=3):
+    """Best of `repeat` runs (seconds, last result)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def write_json(path, chunks, vectors):
+    # The format generate_embeddings.py used to write
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'chunks': chunks, 'embeddings': vectors.tolist(), 'model': 'all-MiniLM-L6-v2',
+                   'embedding_dim': vectors.shape[1]}, f, indent=2, ensure_ascii=False)
+    return os.path.getsize(path)
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return np.asarray(data['embeddings'], dtype=np.float32)
+
+
+def scan_mmap(path):
+    # Open mapped, then one pass over every row (what a search touches)
+    vectors, _ = read_vector_store(path, mmap=True)
+    return float(vectors.sum(dtype=np.float32))
+
+
+if __name__ == "__main__":
+    dim = int(sys.argv[1]) if len(sys.argv) > 1 else 384
+    chunks, vectors = load_chunks_and_vectors(dim)
+    print(f"Chunks: {len(chunks):,}  Dimension: {vectors.shape[1]}\n")
+    print(f"{'format':22} {'size MB':>8} {'write s':>8} {'load s':>8} {'max abs err':>12}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file = os.path.join(tmp, 'embeddings.json')
+        write_s, size = timed(lambda: write_json(json_file, chunks, vectors))
+        load_s, loaded = timed(lambda: load_json(json_file))
+        json_load = load_s
+        print(f"{'JSON (indent=2)':22} {size / 2**20:8.2f} {write_s:8.3f} {load_s:8.3f} "
+              f"{np.abs(loaded - vectors).max():12.2e}")
+
+        for dtype in ('float32', 'float16'):
+            bin_file = os.path.join(tmp, f"embeddings.{dtype}.bin")
+            write_s, sizes = timed(lambda: write_vector_store(bin_file, chunks, vectors, dtype=dtype))
+            load_s, (loaded, _) = timed(lambda: read_vector_store(bin_file, mmap=False))
+            mmap_s, _ = timed(lambda: scan_mmap(bin_file))
+            error = np.abs(loaded.astype(np.float32) - vectors).max()
+            print(f"{'binary ' + dtype:22} {sum(sizes) / 2**20:8.2f} {write_s:8.3f} {load_s:8.3f} "
+                  f"{error:12.2e}   (matrix {sizes[0] / 2**20:.2f} MB + sidecar {sizes[1] / 2**20:.2f} MB; "
+                  f"load {json_load / load_s:.0f}x faster; mmap + scan {mmap_s:.3f}s)")
@@ -0,0 +1,111 @@
+"""
+Boilerplate Stripper - Removes menu/footer blocks repeated across many scraped pages
+"""
+import re
+from collections import Counter
+
+_ALNUM_RE = re.compile(r'\w')
+
+# Lines on more than this share of pages are boilerplate even on their own
+_SITEWIDE_SHARE = 0.5
+
+
+class BoilerplateStripper:
+    def __init__(self, threshold=0.05, min_pages=3, min_block_lines=2, keep_first=True):
+        """
+        Initialize boilerplate stripper
+
+        Args:
+            threshold: Share of pages a line must appear on to count as boilerplate
+            min_pages: Never treat lines seen on fewer pages than this as boilerplate
+            min_block_lines: Consecutive boilerplate lines needed before a block is stripped
+            keep_first: Keep each boilerplate line on the first page it is stripped from,
+                        so menu text stays retrievable once instead of disappearing
+        """
+        self.threshold = threshold
+        self.min_pages = min_pages
+        self.min_block_lines = max(1, min_block_lines)
+        self.keep_first = keep_first
+
+        # Keyed by hash(line), so memory grows with distinct lines, not their text
+        self.line_pages = Counter()
+        self.pages_seen = 0
+        self.kept = set()
+        self.stats = {'pages_stripped': 0, 'lines_removed': 0, 'chars_removed': 0}
+
+    @staticmethod
+    def _lines(text):
+        """Lines worth counting: stripped, with at least one letter or digit"""
+        return [line.strip() for line in text.split('\n') if _ALNUM_RE.search(line)]
+
+    def add(self, text):
+        """Count each distinct line of one page"""
+        self.pages_seen += 1
+        self.line_pages.update({hash(line) for line in self._lines(text)})
+
+    def fit(self, pages):
+        """
+        Count line frequencies across a corpus
+
+        Args:
+            pages: Iterable of page dicts with 'content'
+
+        Returns:
+            BoilerplateStripper: self
+        """
+        for page in pages:
+            self.add(page['content'])
+        return self
+
+    def strip(self, text):
+        """
+        Remove boilerplate blocks from one page
+
+        A block is a run of consecutive frequent lines; it is stripped when it
+        is at least min_block_lines long or every line in it is site-wide.
+
+        Args:
+            text: Page content
+
+        Returns:
+            str: Content without boilerplate
+        """
+        cutoff = max(self.min_pages, self.threshold * self.pages_seen)
+        sitewide = max(cutoff, _SITEWIDE_SHARE * self.pages_seen)
+
+        lines = text.split('\n')
+        keys = [hash(line.strip()) for line in lines]
+        frequent = [self.line_pages[key] >= cutoff and _ALNUM_RE.search(line) is not None
+                    for key, line in zip(keys, lines)]
+
+        kept_lines = []
+        removed = []
+        i = 0
+        while i < len(lines):
+            if not frequent[i]:
+                kept_lines.append(lines[i])
+                i += 1
+                continue
+
+            j = i
+            while j < len(lines) and frequent[j]:
+                j += 1
+
+            block = range(i, j)
+            if j - i >= self.min_block_lines or all(self.line_pages[keys[k]] >= sitewide for k in block):
+                for k in block:
+                    if self.keep_first and keys[k] not in self.kept:
+                        self.kept.add(keys[k])
+                        kept_lines.append(lines[k])
+                    else:
+                        removed.append(lines[k])
+            else:
+                kept_lines.extend(lines[k] for k in block)
+            i = j
+
+        if removed:
+            self.stats['pages_stripped'] += 1
+            self.stats['lines_removed'] += len(removed)
+            self.stats['chars_removed'] += sum(len(line) + 1 for line in removed)
+
+        return '\n'.join(kept_lines)
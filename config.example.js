@@ -16,6 +16,12 @@ const CONFIG = {
         model: 'phi3:mini'
     },
 
+    // RAG search: set serverUrl to a running retrieval_server.py
+    // (e.g. 'http://localhost:8000') to skip downloading embeddings and model
+    rag: {
+        serverUrl: ''
+    },
+
     // Default API mode: 'groq', 'ollama', or 'rule-based'
     apiMode: 'groq'
 };
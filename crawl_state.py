@@ -0,0 +1,123 @@
+"""
+Crawl State - Remembers what was fetched last run so re-crawls can be incremental
+"""
+import hashlib
+import json
+import os
+import threading
+
+
+class CrawlState:
+    def __init__(self, state_file, settings=None):
+        """
+        Initialize crawl state store
+
+        Args:
+            state_file: Path to JSON file holding per-URL state
+            settings: Extraction settings (e.g. parser, min_words) stored
+                      with each page; pages recorded under other settings
+                      are never reused
+        """
+        self.state_file = state_file
+        self.settings = settings or {}
+        self.lock = threading.Lock()
+        self.entries = {}
+
+        if os.path.exists(state_file):
+            with open(state_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+            print(f"📂 Loaded crawl state for {len(self.entries)} URLs")
+
+    @staticmethod
+    def content_hash(content):
+        """SHA-256 of raw response bytes"""
+        return hashlib.sha256(content).hexdigest()
+
+    def get(self, url):
+        """Return stored entry for URL or None"""
+        with self.lock:
+            return self.entries.get(url)
+
+    def _reusable(self, entry):
+        """Entry has a page extracted under the current settings"""
+        return bool(entry and entry.get('page') and entry.get('settings', {}) == self.settings)
+
+    def get_page(self, url):
+        """Return a copy of the stored page for URL, or None if there is none to reuse"""
+        entry = self.get(url)
+        if self._reusable(entry):
+            return dict(entry['page'])
+        return None
+
+    def get_links(self, url):
+        """Return links recorded for URL on the last fetch"""
+        entry = self.get(url)
+        return list(entry.get('links', [])) if entry else []
+
+    def is_unchanged(self, url, lastmod):
+        """
+        Check if sitemap lastmod matches the one recorded last run
+
+        Args:
+            url: Page URL
+            lastmod: Current <lastmod> value from the sitemap
+
+        Returns:
+            bool: True if the stored page can be reused without a request
+        """
+        if not lastmod:
+            return False
+        entry = self.get(url)
+        return self._reusable(entry) and entry.get('lastmod') == lastmod
+
+    def conditional_headers(self, url):
+        """Build If-None-Match / If-Modified-Since headers for URL"""
+        entry = self.get(url)
+        if not self._reusable(entry):
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record(self, url, page, etag=None, last_modified=None, lastmod=None,
+               content_hash=None, links=None):
+        """
+        Store validators and page data for URL
+
+        Args:
+            url: Page URL
+            page: Scraped page dict
+            etag: ETag response header
+            last_modified: Last-Modified response header
+            lastmod: Sitemap <lastmod> value
+            content_hash: Hash of the raw response body
+            links: Links found on the page (replayed when it is reused)
+        """
+        with self.lock:
+            self.entries[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'lastmod': lastmod,
+                'content_hash': content_hash,
+                'links': links or [],
+                'settings': self.settings,
+                'page': {k: v for k, v in page.items() if k != 'priority_score'}
+            }
+
+    def save(self):
+        """Write state to disk atomically"""
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_file = self.state_file + '.tmp'
+        with self.lock:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_file, self.state_file)
+
+        print(f"💾 Saved crawl state for {len(self.entries)} URLs to: {self.state_file}")
@@ -0,0 +1,127 @@
+"""
+Embedding Cache - Persistent SQLite store of chunk vectors keyed by model and text hash
+"""
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+# SQLite's default limit on bound parameters is 999
+_LOOKUP_BATCH = 900
+
+
+class EmbeddingCache:
+    def __init__(self, cache_file, max_size_mb=1024):
+        """
+        Initialize embedding cache
+
+        Vectors are stored as raw float32 blobs under (model, normalize, text hash),
+        so identical chunk text is encoded once across runs, chunk settings
+        and colleges.
+
+        Args:
+            cache_file: SQLite database path
+            max_size_mb: Vector bytes kept; least recently used entries are evicted
+        """
+        directory = os.path.dirname(cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.cache_file = cache_file
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.db = sqlite3.connect(cache_file)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT,
+                normalize INTEGER,
+                text_hash TEXT,
+                vector BLOB,
+                accessed_at REAL,
+                PRIMARY KEY (model, normalize, text_hash)
+            );
+            CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed_at);
+        """)
+        self.db.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, model, normalize, text_hashes):
+        """
+        Look up vectors in bulk
+
+        Args:
+            model: Model name
+            normalize: Whether vectors are L2-normalized
+            text_hashes: SHA-256 hashes of chunk texts
+
+        Returns:
+            dict: text hash -> np.ndarray (float32) for the hits
+        """
+        unique = list(dict.fromkeys(text_hashes))
+        found = {}
+        for i in range(0, len(unique), _LOOKUP_BATCH):
+            batch = unique[i:i + _LOOKUP_BATCH]
+            rows = self.db.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND normalize = ? "
+                f"AND text_hash IN ({','.join('?' * len(batch))})",
+                [model, int(normalize), *batch]
+            )
+            for text_hash, vector in rows:
+                found[text_hash] = np.frombuffer(vector, dtype=np.float32)
+
+        if found:
+            now = time.time()
+            self.db.executemany(
+                "UPDATE embeddings SET accessed_at = ? WHERE model = ? AND normalize = ? AND text_hash = ?",
+                [(now, model, int(normalize), h) for h in found]
+            )
+            self.db.commit()
+
+        self.hits += sum(1 for h in text_hashes if h in found)
+        self.misses += sum(1 for h in text_hashes if h not in found)
+        return found
+
+    def put_many(self, model, normalize, items):
+        """
+        Store vectors, then evict least recently used ones over the size cap
+
+        Args:
+            model: Model name
+            normalize: Whether vectors are L2-normalized
+            items: Iterable of (text hash, vector) pairs
+        """
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+            [(model, int(normalize), h, np.asarray(vector, dtype=np.float32).tobytes(), now)
+             for h, vector in items]
+        )
+        self._evict()
+        self.db.commit()
+
+    def _evict(self):
+        size = self.size()
+        if size <= self.max_size:
+            return
+
+        # Drop the oldest rows in one statement, sized from the average row
+        count = self.db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = int((size - self.max_size) / (size / count)) + 1
+        self.db.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY accessed_at LIMIT ?)", (excess,)
+        )
+
+    def size(self):
+        """Total vector bytes"""
+        return self.db.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def close(self):
+        self.db.close()
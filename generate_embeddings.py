@@ -1,79 +1,246 @@
 """
 Embedding Generator - Creates embeddings for RAG using sentence-transformers
 """
+import argparse
 import json
 import os
+import time
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from ann_index import build_index, save_index
+from embedding_cache import EmbeddingCache
+from manifest import text_hash
+from page_store import iter_records
+from retrieval import load_matrix
+from vector_store import read_vector_store, write_vector_store
 
 
 class EmbeddingGenerator:
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
+    def __init__(self, model_name='all-MiniLM-L6-v2', normalize=True, cache=None, backend='torch'):
         """
         Initialize embedding generator
 
         Args:
             model_name: Name of sentence-transformers model
+            normalize: L2-normalize embeddings (cosine similarity is then a
+                       dot product; see retrieval.py)
+            cache: EmbeddingCache shared across runs (optional)
+            backend: 'torch' (sentence-transformers), 'onnx' (onnxruntime, fp32)
+                     or 'onnx-int8' (dynamically quantized); ONNX skips the
+                     torch import except for the one-time export
         """
-        print(f"📦 Loading model: {model_name}")
-        self.model = SentenceTransformer(model_name)
-        print(f"✓ Model loaded")
+        print(f"📦 Loading model: {model_name} ({backend})")
+        start = time.perf_counter()
+        self.model_name = model_name
+        self.normalize = normalize
+        self.cache = cache
+        self.backend = backend
+
+        if backend == 'torch':
+            from sentence_transformers import SentenceTransformer
+            self.model = SentenceTransformer(model_name)
+        elif backend in ('onnx', 'onnx-int8'):
+            from onnx_backend import OnnxEmbedder
+            self.model = OnnxEmbedder(model_name, quantize=backend == 'onnx-int8')
+        else:
+            raise ValueError(f"Unknown backend: {backend}")
+
+        # Vectors from different backends differ slightly, so they are cached apart
+        self.model_key = model_name if backend == 'torch' else f"{model_name}:{backend}"
+        print(f"✓ Model loaded in {time.perf_counter() - start:.1f}s")
 
-    def generate_embeddings(self, chunks, batch_size=32):
+    def load_previous(self, embeddings_file, dtype='float32'):
+        """
+        Load vectors from an earlier run, keyed by chunk text hash
+
+        Args:
+            embeddings_file: Earlier output of save_knowledge_base
+                             (binary store or JSON)
+            dtype: Precision this run saves at; float16 vectors are not
+                   reused for a float32 store
+
+        Returns:
+            dict: text hash -> embedding (empty if missing or from another model)
+        """
+        if not os.path.exists(embeddings_file):
+            return {}
+
+        if embeddings_file.endswith('.json'):
+            with open(embeddings_file, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            embeddings = previous['embeddings']
+        else:
+            embeddings, previous = read_vector_store(embeddings_file)
+            if previous['dtype'] == 'float16' and dtype != 'float16':
+                return {}
+            embeddings = embeddings.astype(np.float32)
+
+        if (previous.get('model') != self.model_name
+                or previous.get('backend', 'torch') != self.backend
+                or previous.get('normalized', False) != self.normalize):
+            return {}
+
+        return {text_hash(chunk['content']): embedding
+                for chunk, embedding in zip(previous['chunks'], embeddings)}
+
+    def generate_embeddings(self, chunks, batch_size=32, previous=None, workers=1):
         """
         Generate embeddings for all chunks
 
+        Vectors come from `previous`, then the cache; only the remaining
+        distinct texts are encoded (and added to the cache).
+
         Args:
             chunks: List of chunk dicts with 'content' key
             batch_size: Batch size for encoding
+            previous: Vectors from load_previous; chunks whose text is
+                      unchanged reuse them instead of being re-encoded
+            workers: Encoding processes; above 1, texts are bucketed by
+                     length and spread over a multi-process pool (torch, CPU)
 
         Returns:
-            list: List of embeddings (as lists)
+            list: One vector per chunk
         """
-        print(f"\n🔢 Generating embeddings for {len(chunks)} chunks...")
+        previous = previous or {}
+        hashes = [text_hash(chunk['content']) for chunk in chunks]
+        embeddings_list = [previous.get(h) for h in hashes]
+        missing = [i for i, embedding in enumerate(embeddings_list) if embedding is None]
+        print(f"\n🔢 Embedding {len(chunks)} chunks ({len(chunks) - len(missing)} unchanged since last run)...")
+
+        if missing and self.cache:
+            found = self.cache.get_many(self.model_key, self.normalize, [hashes[i] for i in missing])
+            for i in missing:
+                if hashes[i] in found:
+                    embeddings_list[i] = found[hashes[i]]
+            missing = [i for i in missing if embeddings_list[i] is None]
+            print(f"✓ Embedding cache: {self.cache.hits}/{self.cache.hits + self.cache.misses} hits "
+                  f"({self.cache.hit_rate:.0%})")
+
+        if not missing:
+            return embeddings_list
+
+        # Encode each distinct text once
+        todo = {}
+        for i in missing:
+            todo.setdefault(hashes[i], i)
+        texts = [chunks[i]['content'] for i in todo.values()]
 
-        # Extract texts
-        texts = [chunk['content'] for chunk in chunks]
+        # Input past the model window is silently dropped by encode()
+        limit = self.model.max_seq_length
+        lengths = [len(ids) for ids in self.model.tokenizer(texts)['input_ids']]
+        truncated = sum(length > limit for length in lengths)
+        if truncated:
+            print(f"⚠ {truncated} chunks exceed {limit} tokens and will be truncated "
+                  f"(run python process_documents.py --chunk-unit tokens)")
 
         # Generate embeddings in batches
-        embeddings = self.model.encode(
-            texts,
-            batch_size=batch_size,
-            show_progress_bar=True,
-            convert_to_numpy=True
-        )
+        if workers > 1 and self.backend == 'torch':
+            embeddings = self.encode_bucketed(texts, lengths, batch_size, workers)
+        else:
+            embeddings = self.model.encode(
+                texts,
+                batch_size=batch_size,
+                show_progress_bar=True,
+                convert_to_numpy=True,
+                normalize_embeddings=self.normalize
+            )
 
-        # Convert to list of lists for JSON serialization
-        embeddings_list = embeddings.tolist()
+        if self.cache:
+            self.cache.put_many(self.model_key, self.normalize, zip(todo, embeddings))
 
-        print(f"✓ Generated {len(embeddings_list)} embeddings")
-        print(f"   Dimension: {len(embeddings_list[0])}")
+        encoded = dict(zip(todo, embeddings))
+        for i in missing:
+            embeddings_list[i] = encoded[hashes[i]]
+
+        print(f"✓ Generated {len(texts)} embeddings")
+        print(f"   Dimension: {embeddings.shape[1]}")
 
         return embeddings_list
 
-    def save_knowledge_base(self, chunks, embeddings, output_file):
+    def encode_bucketed(self, texts, lengths, batch_size=32, workers=2, bucket_batches=4):
         """
-        Save chunks and embeddings to JSON file
+        Encode texts in length buckets spread over a multi-process pool
+
+        Texts are sorted by token length and cut into buckets of similar
+        length, so batches carry little padding, and each worker process
+        encodes whole buckets with cpu_count // workers torch threads.
+        Results are put back in input order.
+
+        Args:
+            texts: Texts to encode
+            lengths: Token length of each text
+            batch_size: Batch size within a worker
+            workers: Number of encoding processes
+            bucket_batches: Batches per bucket handed to a worker at a time
+
+        Returns:
+            np.ndarray: Embeddings in the order of texts
+        """
+        order = np.argsort(lengths, kind='stable')
+        sorted_texts = [texts[i] for i in order]
+
+        # Split the cores between workers: each would otherwise start one
+        # torch thread per core. Spawned workers read this when importing torch
+        threads = str(max(1, (os.cpu_count() or 1) // workers))
+        saved = os.environ.get('OMP_NUM_THREADS')
+        os.environ['OMP_NUM_THREADS'] = threads
+        try:
+            pool = self.model.start_multi_process_pool(target_devices=['cpu'] * workers)
+        finally:
+            if saved is None:
+                del os.environ['OMP_NUM_THREADS']
+            else:
+                os.environ['OMP_NUM_THREADS'] = saved
+        try:
+            # Buckets are consecutive runs of the length-sorted texts
+            sorted_embeddings = self.model.encode_multi_process(
+                sorted_texts, pool, batch_size=batch_size, chunk_size=batch_size * bucket_batches
+            )
+        finally:
+            self.model.stop_multi_process_pool(pool)
+
+        embeddings = np.empty_like(sorted_embeddings)
+        embeddings[order] = sorted_embeddings
+
+        if self.normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.maximum(norms, 1e-12)
+        return embeddings
+
+    def save_knowledge_base(self, chunks, embeddings, output_file, dtype='float32'):
+        """
+        Save chunks and embeddings
+
+        A .bin output is a binary matrix (see vector_store.py) with chunks in
+        a .chunks.json sidecar; a .json output is the older single JSON file.
 
         Args:
             chunks: List of chunk dicts
             embeddings: List of embedding vectors
             output_file: Path to output file
+            dtype: Matrix precision for .bin output ('float32' or 'float16')
         """
-        knowledge_base = {
-            'chunks': chunks,
-            'embeddings': embeddings,
-            'model': 'all-MiniLM-L6-v2',
-            'embedding_dim': len(embeddings[0]) if embeddings else 0
+        info = {
+            'model': self.model_name,
+            'backend': self.backend,
+            'normalized': self.normalize
         }
 
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        if output_file.endswith('.json'):
+            knowledge_base = dict(
+                info,
+                chunks=chunks,
+                embeddings=np.asarray(embeddings, dtype=np.float32).tolist(),
+                embedding_dim=len(embeddings[0]) if len(embeddings) else 0
+            )
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(knowledge_base, f, indent=2, ensure_ascii=False)
+            file_size = os.path.getsize(output_file)
+        else:
+            file_size = sum(write_vector_store(output_file, chunks, embeddings, info, dtype))
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(knowledge_base, f, indent=2, ensure_ascii=False)
-
-        # Get file size
-        file_size = os.path.getsize(output_file) / (1024 * 1024)  # MB
+        file_size /= 1024 * 1024  # MB
 
         print(f"\n💾 Saved to: {output_file}")
         print(f"   File size: {file_size:.2f} MB")
@@ -82,31 +249,62 @@ class EmbeddingGenerator:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed data/knowledge_base.jsonl into data/embeddings.bin")
+    parser.add_argument('--backend', choices=['torch', 'onnx', 'onnx-int8'], default='torch',
+                        help="Inference backend (default: torch)")
+    parser.add_argument('--dtype', choices=['float32', 'float16'], default='float32',
+                        help="Stored vector precision (default: float32)")
+    parser.add_argument('--index', choices=['auto', 'hnsw', 'ivf', 'int8', 'binary'],
+                        help="Also build an ANN index next to the embeddings "
+                             "(auto: HNSW if hnswlib is installed, else numpy IVF-flat; "
+                             "int8 / binary: quantized codes with exact rescoring)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Encoding processes for torch on CPU; above 1, length-bucketed "
+                             "texts are spread over a process pool (default: 1)")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("  EMBEDDING GENERATOR")
     print("=" * 60)
 
-    # Load knowledge base
-    input_file = 'data/knowledge_base.json'
+    # Load knowledge base: JSONL from process_documents.py, or the older JSON array
+    input_file = 'data/knowledge_base.jsonl'
+    if not os.path.exists(input_file):
+        input_file = 'data/knowledge_base.json'
     print(f"\n📂 Loading: {input_file}")
 
-    try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            chunks = json.load(f)
-    except FileNotFoundError:
+    if not os.path.exists(input_file):
         print(f"❌ File not found: {input_file}")
         print("💡 Run processor first: python process_documents.py")
         exit(1)
 
+    chunks = list(iter_records(input_file))
+
     print(f"✓ Loaded {len(chunks)} chunks")
 
-    # Generate embeddings
-    generator = EmbeddingGenerator()
-    embeddings = generator.generate_embeddings(chunks, batch_size=32)
+    # Generate embeddings, reusing vectors of chunks whose text did not change
+    output_file = 'data/embeddings.bin'
+    generator = EmbeddingGenerator(cache=EmbeddingCache('data/embedding_cache.sqlite'), backend=args.backend)
+    previous_file = output_file if os.path.exists(output_file) else 'data/embeddings.json'
+    previous = generator.load_previous(previous_file, dtype=args.dtype)
+    # The pool is torch-on-CPU only: a GPU is faster on its own, and
+    # onnxruntime already uses every core
+    workers = args.workers
+    if workers > 1 and (args.backend != 'torch' or generator.model.device.type == 'cuda'):
+        print(f"⚠ --workers applies to the torch backend on CPU; encoding in one process")
+        workers = 1
+    embeddings = generator.generate_embeddings(chunks, batch_size=32, previous=previous, workers=workers)
 
     # Save
-    output_file = 'data/embeddings.json'
-    generator.save_knowledge_base(chunks, embeddings, output_file)
+    generator.save_knowledge_base(chunks, embeddings, output_file, dtype=args.dtype)
+
+    if args.index:
+        print(f"\n🧭 Building ANN index ({args.index})...")
+        start = time.perf_counter()
+        matrix, _ = load_matrix(output_file)
+        index = build_index(matrix, kind=args.index)
+        print(f"✓ Saved {index.kind} index in {time.perf_counter() - start:.1f}s to: "
+              f"{save_index(index, output_file)}")
 
     print(f"\n✅ Embeddings generated successfully!")
     print(f"\n📌 Next step: Open index.html in browser to test chatbot")
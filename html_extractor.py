@@ -0,0 +1,117 @@
+"""
+HTML Extractor - Converts raw HTML to markdown page data (CPU-bound, process-pool safe)
+"""
+import threading
+from datetime import datetime
+from urllib.parse import urldefrag, urljoin, urlparse
+
+from bs4 import BeautifulSoup
+from html2text import HTML2Text
+
+# HTML2Text is stateful, so keep one converter per thread (and per worker process)
+_local = threading.local()
+
+
+def _html2text():
+    """HTML to markdown converter for the current thread"""
+    converter = getattr(_local, 'converter', None)
+    if converter is None:
+        converter = HTML2Text()
+        converter.ignore_links = False
+        converter.ignore_images = True
+        converter.ignore_emphasis = False
+        converter.body_width = 0  # Don't wrap lines
+        _local.converter = converter
+    return converter
+
+
+def available_parser(parser):
+    """
+    Return the requested BeautifulSoup parser, or html.parser if it is not installed
+
+    Args:
+        parser: Parser name ('html.parser' or 'lxml')
+
+    Returns:
+        str: Parser name that can be used
+    """
+    if parser == 'lxml':
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            print("⚠ lxml is not installed, falling back to html.parser")
+            return 'html.parser'
+    return parser
+
+
+def extract_links(soup, url):
+    """
+    Collect absolute http(s) links from a page, without fragments or duplicates
+
+    Args:
+        soup: Parsed page
+        url: Page URL used to resolve relative links
+
+    Returns:
+        list: Absolute URLs in document order
+    """
+    links = {}
+    for anchor in soup.find_all('a', href=True):
+        link = urldefrag(urljoin(url, anchor['href'].strip()))[0]
+        if link.startswith(('http://', 'https://')):
+            links[link] = None
+    return list(links)
+
+
+def extract_page(url, html, encoding=None, parser='html.parser', min_words=0, find_links=False):
+    """
+    Extract title and markdown content from raw HTML
+
+    Args:
+        url: Page URL
+        html: Raw response body (bytes)
+        encoding: Response encoding, if known
+        parser: BeautifulSoup parser backend
+        min_words: Minimum words required to keep the page
+        find_links: Also return the page's links (for link-following crawls)
+
+    Returns:
+        tuple: (page dict or None if below min_words, word count, links)
+    """
+    soup = BeautifulSoup(html, parser, from_encoding=encoding)
+
+    # Links are collected before nav/header/footer are removed - menus are
+    # where most of a site's structure lives
+    links = extract_links(soup, url) if find_links else []
+
+    # Remove unwanted elements
+    for element in soup(['script', 'style', 'nav', 'footer', 'header', 'iframe', 'noscript']):
+        element.decompose()
+
+    # Get title
+    title = soup.title.string if soup.title else urlparse(url).path
+
+    # Convert to markdown
+    markdown_content = _html2text().handle(str(soup))
+
+    # Clean up markdown
+    markdown_content = '\n'.join([
+        line for line in markdown_content.split('\n')
+        if line.strip() and not line.strip().startswith('#####')
+    ])
+
+    # Count words
+    word_count = len(markdown_content.split())
+
+    # Check minimum words
+    if word_count < min_words:
+        return None, word_count, links
+
+    page = {
+        'url': url,
+        'title': title.strip() if title else url,
+        'content': markdown_content.strip(),
+        'word_count': word_count,
+        'scraped_at': datetime.now().isoformat()
+    }
+    return page, word_count, links
@@ -0,0 +1,312 @@
+"""
+HTTP Cache - On-disk response cache and offline replay for the scraper's requests.Session
+"""
+import hashlib
+import http.client
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+# Body is stored decoded, so these no longer describe it
+_DROP_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+
+
+class ResponseCache:
+    def __init__(self, cache_dir, max_size_mb=500):
+        """
+        Initialize response cache
+
+        Bodies are zlib-compressed and stored once per SHA-256 of their
+        content; a SQLite index maps URLs to status, headers and body hash.
+
+        Args:
+            cache_dir: Directory for the index and body blobs
+            max_size_mb: Compressed size cap; least recently used entries are evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.blob_dir = os.path.join(cache_dir, 'blobs')
+        os.makedirs(self.blob_dir, exist_ok=True)
+        # Bodies being recorded; anything left here is from an interrupted run
+        self.tmp_dir = os.path.join(cache_dir, 'tmp')
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'), check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                status INTEGER,
+                headers TEXT,
+                body_hash TEXT,
+                stored_at REAL,
+                accessed_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                size INTEGER
+            );
+        """)
+        self.db.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _blob_path(self, body_hash):
+        return os.path.join(self.blob_dir, body_hash[:2], body_hash + '.z')
+
+    def get(self, url):
+        """
+        Look up a cached response
+
+        Returns:
+            tuple: (status, headers dict, body bytes) or None
+        """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT status, headers, body_hash FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.db.execute("UPDATE entries SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self.db.commit()
+            self.hits += 1
+
+        status, headers, body_hash = row
+        try:
+            with open(self._blob_path(body_hash), 'rb') as f:
+                body = zlib.decompress(f.read())
+        except OSError:
+            return None
+        return status, json.loads(headers), body
+
+    def put(self, url, status, headers, body):
+        """Store a response, then evict least recently used entries over the size cap"""
+        writer = self.writer(url, status, headers)
+        writer.write(body)
+        writer.commit()
+
+    def writer(self, url, status, headers):
+        """
+        Start recording a response whose body arrives in pieces
+
+        Returns:
+            BodyWriter: write() each piece, then commit() at the end of the
+                        body (or discard() if it is abandoned)
+        """
+        return BodyWriter(self, url, status, headers)
+
+    def _store(self, url, status, headers, body_hash, tmp_path, compressed_size):
+        headers = {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS}
+        now = time.time()
+
+        with self.lock:
+            known = self.db.execute("SELECT 1 FROM blobs WHERE hash = ?", (body_hash,)).fetchone()
+            if known:
+                os.remove(tmp_path)
+            else:
+                path = self._blob_path(body_hash)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+                self.db.execute("INSERT INTO blobs (hash, size) VALUES (?, ?)", (body_hash, compressed_size))
+
+            old = self.db.execute("SELECT body_hash FROM entries WHERE url = ?", (url,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (url, status, json.dumps(headers), body_hash, now, now)
+            )
+            if old and old[0] != body_hash:
+                self._drop_blob_if_unused(old[0])
+
+            self._evict()
+            self.db.commit()
+
+    def _drop_blob_if_unused(self, body_hash):
+        used = self.db.execute("SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)).fetchone()
+        if used:
+            return
+        self.db.execute("DELETE FROM blobs WHERE hash = ?", (body_hash,))
+        try:
+            os.remove(self._blob_path(body_hash))
+        except OSError:
+            pass
+
+    def _evict(self):
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        while total > self.max_size:
+            oldest = self.db.execute(
+                "SELECT url, body_hash FROM entries ORDER BY accessed_at LIMIT 1"
+            ).fetchone()
+            if oldest is None:
+                break
+            self.db.execute("DELETE FROM entries WHERE url = ?", (oldest[0],))
+            self._drop_blob_if_unused(oldest[1])
+            total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def size(self):
+        """Total compressed size in bytes"""
+        with self.lock:
+            return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+
+class BodyWriter:
+    def __init__(self, cache, url, status, headers):
+        """
+        Compress a response body to a temporary file as it arrives
+
+        Only commit() makes it visible in the cache, so a partly read body
+        never replaces a complete one.
+
+        Args:
+            cache: ResponseCache the body is stored in
+            url, status, headers: The response being recorded
+        """
+        self.cache = cache
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.hash = hashlib.sha256()
+        self.compressor = zlib.compressobj(6)
+        self.file = tempfile.NamedTemporaryFile(dir=cache.tmp_dir, suffix='.z', delete=False)
+        self.size = 0
+
+    def write(self, data):
+        self.hash.update(data)
+        compressed = self.compressor.compress(data)
+        self.file.write(compressed)
+        self.size += len(compressed)
+
+    def commit(self):
+        tail = self.compressor.flush()
+        self.file.write(tail)
+        self.file.close()
+        self.cache._store(self.url, self.status, self.headers, self.hash.hexdigest(),
+                          self.file.name, self.size + len(tail))
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.file.name)
+        except OSError:
+            pass
+
+
+class RecordingBody:
+    def __init__(self, raw, writer):
+        """
+        Stand-in for a response's urllib3 body that records what is read
+
+        The body reaches the cache as the caller consumes it (streamed or
+        not) and is committed at end of body, so streaming responses are
+        never held whole in memory.
+
+        Args:
+            raw: urllib3 HTTPResponse
+            writer: BodyWriter for the response
+        """
+        self._raw = raw
+        self._writer = writer
+        # The cache stores decoded bodies; raw reads of an encoded body can't be recorded
+        self._encoded = raw.headers.get('content-encoding', 'identity').lower() != 'identity'
+
+    def _record(self, data, decode_content):
+        if self._writer is None:
+            return
+        if self._encoded and not (self._raw.decode_content if decode_content is None else decode_content):
+            self._finish(False)
+        elif data:
+            self._writer.write(data)
+
+    def _finish(self, complete):
+        if self._writer is not None:
+            if complete:
+                self._writer.commit()
+            else:
+                self._writer.discard()
+            self._writer = None
+
+    def read(self, amt=None, decode_content=None, **kwargs):
+        data = self._raw.read(amt, decode_content=decode_content, **kwargs)
+        self._record(data, decode_content)
+        if amt is None or (not data and amt):
+            self._finish(True)
+        return data
+
+    def stream(self, amt=2**16, decode_content=None):
+        for data in self._raw.stream(amt, decode_content=decode_content):
+            self._record(data, decode_content)
+            yield data
+        self._finish(True)
+
+    def close(self):
+        # Closed before the end of the body: nothing complete to store
+        self._finish(False)
+        self._raw.close()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class CachingAdapter(HTTPAdapter):
+    def __init__(self, cache, offline=False, **kwargs):
+        """
+        Transport adapter that records GET responses and can replay them offline
+
+        Args:
+            cache: ResponseCache
+            offline: Serve only from the cache; never touch the network
+            **kwargs: Passed to HTTPAdapter (pool sizes, retries)
+        """
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.offline = offline
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if request.method not in ('GET', 'HEAD'):
+            if self.offline:
+                raise requests.exceptions.ConnectionError(f"Offline: cannot send {request.method} {request.url}")
+            return super().send(request, stream, timeout, verify, cert, proxies)
+
+        if self.offline:
+            cached = self.cache.get(request.url)
+            if cached is None:
+                raise requests.exceptions.ConnectionError(f"Offline: {request.url} is not cached")
+            return self._replay(request, *cached)
+
+        response = super().send(request, stream, timeout, verify, cert, proxies)
+
+        # Record successful GET bodies as they are read (stream=True or not);
+        # errors and 304s leave the cached entry as it was
+        if request.method == 'GET' and 200 <= response.status_code < 300:
+            writer = self.cache.writer(request.url, response.status_code, dict(response.headers))
+            response.raw = RecordingBody(response.raw, writer)
+        return response
+
+    def _replay(self, request, status, headers, body):
+        if request.method == 'HEAD':
+            body = b''
+        headers = dict(headers, **{'Content-Length': str(len(body))})
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=headers,
+            status=status,
+            reason=http.client.responses.get(status),
+            preload_content=False,
+            decode_content=False,
+            request_method=request.method
+        )
+        return self.build_response(request, raw)
@@ -0,0 +1,89 @@
+"""
+Link Frontier - Priority queue of URLs for link-following crawls
+"""
+import hashlib
+import heapq
+
+from url_filter import normalize_url
+
+
+class LinkFrontier:
+    def __init__(self, url_filter, max_depth=3, max_pages=100, max_size=10000):
+        """
+        Initialize crawl frontier
+
+        Args:
+            url_filter: URLFilter used for crawlability and priority scores
+            max_depth: Deepest link level to follow (homepage is depth 0)
+            max_pages: Maximum URLs handed out for fetching
+            max_size: Maximum URLs kept waiting in the frontier
+        """
+        self.url_filter = url_filter
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_size = max_size
+
+        self.heap = []
+        self.seen = set()
+        self.counter = 0
+        self.issued = 0
+
+    @staticmethod
+    def _fingerprint(url):
+        """64-bit hash of a normalized URL (much smaller than the URL string)"""
+        return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def add(self, url, depth=0):
+        """
+        Queue URL if it is new, crawlable and within max_depth
+
+        Args:
+            url: Absolute URL
+            depth: Link depth from the seed
+
+        Returns:
+            bool: True if URL was queued
+        """
+        if depth > self.max_depth:
+            return False
+
+        url = normalize_url(url)
+        fingerprint = self._fingerprint(url)
+        if fingerprint in self.seen:
+            return False
+        self.seen.add(fingerprint)
+
+        if not self.url_filter.is_crawlable(url):
+            return False
+
+        score = self.url_filter.calculate_priority(url, depth=depth)
+
+        # Min-heap on (-score, insertion order): best score first, FIFO on ties
+        heapq.heappush(self.heap, (-score, self.counter, url, depth))
+        self.counter += 1
+
+        # Bounded memory: keep only the best max_size entries
+        if len(self.heap) > 2 * self.max_size:
+            self.heap = heapq.nsmallest(self.max_size, self.heap)
+            heapq.heapify(self.heap)
+
+        return True
+
+    def add_links(self, links, depth):
+        """Queue links found on a page at the given depth"""
+        for link in links:
+            self.add(link, depth)
+
+    def next_url(self):
+        """
+        Pop the highest-priority URL
+
+        Returns:
+            dict: URL dict with url, score, depth, or None if empty or max_pages reached
+        """
+        if not self.heap or self.issued >= self.max_pages:
+            return None
+
+        neg_score, _, url, depth = heapq.heappop(self.heap)
+        self.issued += 1
+        return {'url': url, 'score': -neg_score, 'depth': depth, 'lastmod': None}
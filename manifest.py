@@ -0,0 +1,86 @@
+"""
+Manifest - Page content hashes and chunk text hashes for incremental processing
+"""
+import hashlib
+import json
+import os
+
+
+def text_hash(text):
+    """SHA-256 of text (UTF-8)"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class Manifest:
+    def __init__(self, manifest_file):
+        """
+        Initialize manifest
+
+        The previous run's entries are loaded for comparison; this run's
+        entries are collected with record() and replace them on save().
+
+        Args:
+            manifest_file: Path to JSON manifest (next to the knowledge base)
+        """
+        self.manifest_file = manifest_file
+        self.previous = {}
+        self.pages = {}
+        self.stats = {'new': 0, 'changed': 0, 'unchanged': 0}
+
+        if os.path.exists(manifest_file):
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                self.previous = json.load(f).get('pages', {})
+
+    @staticmethod
+    def page_hash(page):
+        """Hash of the scraped fields that end up in chunks"""
+        return text_hash(f"{page['title']}\n{page['content']}")
+
+    def record(self, page, chunks):
+        """
+        Record a page and the chunks made from it
+
+        Args:
+            page: Scraped page dict
+            chunks: Chunk dicts produced for the page (empty for duplicates)
+
+        Returns:
+            str: 'new', 'changed' or 'unchanged'
+        """
+        page_hash = self.page_hash(page)
+        old = self.previous.get(page['url'])
+        if old is None:
+            status = 'new'
+        elif old['hash'] == page_hash:
+            status = 'unchanged'
+        else:
+            status = 'changed'
+        self.stats[status] += 1
+
+        self.pages[page['url']] = {
+            'hash': page_hash,
+            'chunks': [text_hash(chunk['content']) for chunk in chunks]
+        }
+        return status
+
+    def deleted(self):
+        """URLs in the previous manifest that were not recorded this run"""
+        return [url for url in self.previous if url not in self.pages]
+
+    def new_chunk_hashes(self):
+        """Chunk text hashes recorded this run that the previous run did not have"""
+        previous = {h for entry in self.previous.values() for h in entry['chunks']}
+        return {h for entry in self.pages.values() for h in entry['chunks']} - previous
+
+    def save(self):
+        """Write this run's entries to disk atomically"""
+        directory = os.path.dirname(self.manifest_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_file = self.manifest_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'pages': self.pages}, f)
+        os.replace(tmp_file, self.manifest_file)
+
+        print(f"💾 Saved manifest for {len(self.pages)} pages to: {self.manifest_file}")
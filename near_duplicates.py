@@ -0,0 +1,147 @@
+"""
+Near-Duplicate Detector - Collapses templated pages using MinHash + LSH
+"""
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD_RE = re.compile(r'\w+')
+# Shingles permuted at a time, so temporaries stay O(block x num_perm)
+_SHINGLE_BLOCK = 4096
+
+
+class NearDuplicateDetector:
+    def __init__(self, threshold=0.9, num_perm=128, bands=16, shingle_size=3, seed=1):
+        """
+        Initialize near-duplicate detector
+
+        Args:
+            threshold: Estimated Jaccard similarity at which pages are duplicates
+            num_perm: MinHash signature length
+            bands: LSH bands (num_perm must divide evenly)
+            shingle_size: Words per shingle
+            seed: Seed for the hash permutations (fixed for reproducible runs)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self.perm_a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.perm_b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+        self.buckets = defaultdict(list)
+        self.signatures = []
+        self.canonical_urls = []
+        self.canonical_of = {}
+        self.alias_map = defaultdict(list)
+        self.pages_seen = 0
+
+    def _shingles(self, text):
+        """Hash word shingles of text to 32-bit ints"""
+        words = _WORD_RE.findall(text.lower())
+        k = self.shingle_size
+        if len(words) <= k:
+            grams = [' '.join(words)] if words else []
+        else:
+            grams = {' '.join(words[i:i + k]) for i in range(len(words) - k + 1)}
+        return np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64)
+
+    def signature(self, text):
+        """
+        MinHash signature of text
+
+        Returns:
+            np.ndarray: num_perm uint32 values, or None for empty text
+        """
+        hashes = self._shingles(text)
+        if len(hashes) == 0:
+            return None
+
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(hashes), _SHINGLE_BLOCK):
+            block = hashes[start:start + _SHINGLE_BLOCK, None]
+            permuted = ((block * self.perm_a + self.perm_b) % _MERSENNE_PRIME) & _MAX_HASH
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start:start + self.rows].tobytes()
+
+    def add(self, url, text):
+        """
+        Fingerprint a page and match it against earlier canonical pages
+
+        Only canonical pages are indexed, so each page is compared with the
+        few canonicals sharing an LSH band - not with every earlier page.
+
+        Args:
+            url: Page URL
+            text: Page content
+
+        Returns:
+            str: Canonical URL if the page is a near-duplicate, None otherwise
+        """
+        self.pages_seen += 1
+        signature = self.signature(text)
+        if signature is None:
+            return None
+
+        keys = list(self._band_keys(signature))
+        candidates = {idx for key in keys for idx in self.buckets.get(key, ())}
+
+        best, best_similarity = None, self.threshold
+        for idx in candidates:
+            similarity = float(np.mean(self.signatures[idx] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = idx, similarity
+
+        if best is not None:
+            canonical = self.canonical_urls[best]
+            self.canonical_of[url] = canonical
+            self.alias_map[canonical].append(url)
+            return canonical
+
+        idx = len(self.signatures)
+        self.signatures.append(signature)
+        self.canonical_urls.append(url)
+        for key in keys:
+            self.buckets[key].append(idx)
+        return None
+
+    def fit(self, pages):
+        """
+        Fingerprint pages in order; earlier pages become canonical
+
+        Args:
+            pages: Iterable of page dicts with 'url' and 'content'
+
+        Returns:
+            NearDuplicateDetector: self
+        """
+        for page in pages:
+            self.add(page['url'], page['content'])
+        return self
+
+    def is_duplicate(self, url):
+        """True if URL was collapsed into an earlier page"""
+        return url in self.canonical_of
+
+    def aliases(self, url):
+        """URLs collapsed into this canonical page"""
+        return list(self.alias_map.get(url, []))
+
+    @property
+    def duplicate_count(self):
+        return len(self.canonical_of)
@@ -0,0 +1,164 @@
+"""
+ONNX Backend - Runs the sentence-transformers model through onnxruntime (optionally int8)
+"""
+import inspect
+import os
+import time
+
+import numpy as np
+
+
+class OnnxEmbedder:
+    def __init__(self, model_name='all-MiniLM-L6-v2', onnx_dir='data/onnx', quantize=False,
+                 max_seq_length=256, normalize_output=True, threads=None):
+        """
+        Initialize ONNX embedder, exporting the model on first use
+
+        Only onnxruntime and the tokenizer are loaded at startup; torch is
+        needed just once, to export the model.
+
+        Args:
+            model_name: sentence-transformers model name
+            onnx_dir: Directory holding exported models and tokenizer
+            quantize: Use a dynamically int8-quantized copy of the model
+            max_seq_length: Tokens per input, as in sentence-transformers
+            normalize_output: L2-normalize after pooling (all-MiniLM-L6-v2
+                              ends with a Normalize layer)
+            threads: onnxruntime intra-op threads (default: all cores)
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.max_seq_length = max_seq_length
+        self.normalize_output = normalize_output
+        self.model_dir = os.path.join(onnx_dir, model_name.replace('/', '__'))
+
+        fp32_path = os.path.join(self.model_dir, 'model.onnx')
+        if not os.path.exists(fp32_path):
+            export_onnx(model_name, self.model_dir)
+
+        model_path = fp32_path
+        if quantize:
+            model_path = os.path.join(self.model_dir, 'model.int8.onnx')
+            if not os.path.exists(model_path):
+                quantize_onnx(fp32_path, model_path)
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, **kwargs):
+        """
+        Embed texts (same call shape as SentenceTransformer.encode)
+
+        Texts are encoded longest first so each batch pads to similar lengths.
+
+        Args:
+            texts: List of strings
+            batch_size: Texts per inference call
+            normalize_embeddings: L2-normalize the result
+
+        Returns:
+            np.ndarray: float32 embeddings in input order
+        """
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            batch = [texts[i] for i in order[start:start + batch_size]]
+            batches.append(self._encode_batch(batch))
+
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        embeddings = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.concatenate(batches)
+
+        if self.normalize_output or normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings
+
+    def _encode_batch(self, texts):
+        encoded = self.tokenizer(texts, padding=True, truncation=True,
+                                 max_length=self.max_seq_length, return_tensors='np')
+        feeds = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real (unpadded) tokens
+        mask = encoded['attention_mask'][..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        return summed / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+def export_onnx(model_name, model_dir):
+    """
+    Export a sentence-transformers model's transformer to ONNX (needs torch, once)
+
+    Args:
+        model_name: sentence-transformers model name
+        model_dir: Output directory for model.onnx and the tokenizer
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    print(f"📦 Exporting {model_name} to ONNX (one time)...")
+    start = time.perf_counter()
+    os.makedirs(model_dir, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device='cpu')
+    transformer = st_model[0].auto_model.eval()
+    st_model.tokenizer.save_pretrained(model_dir)
+
+    dummy = st_model.tokenizer(['export'], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in dummy]
+
+    class TokenEmbeddings(torch.nn.Module):
+        """Positional inputs -> last hidden state (forward signatures vary across transformers)"""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs)))[0]
+
+    dynamic = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+    export_args = dict(
+        input_names=input_names,
+        output_names=['last_hidden_state'],
+        dynamic_axes=dynamic,
+        opset_version=14
+    )
+    # Newer torch defaults to the dynamo exporter (needs onnxscript); the
+    # TorchScript exporter handles this model and older torch has no flag
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        export_args['dynamo'] = False
+
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer),
+            tuple(dummy[name] for name in input_names),
+            os.path.join(model_dir, 'model.onnx'),
+            **export_args
+        )
+    print(f"✓ Exported in {time.perf_counter() - start:.1f}s to: {model_dir}")
+
+
+def quantize_onnx(fp32_path, int8_path):
+    """
+    Write a dynamically int8-quantized copy of an ONNX model
+
+    Args:
+        fp32_path: Exported fp32 model
+        int8_path: Output path
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    print("📦 Quantizing ONNX model to int8 (one time)...")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"✓ Saved: {int8_path}")
@@ -0,0 +1,187 @@
+"""
+Page Store - Append-only JSONL output so long crawls survive interruption
+"""
+import json
+import os
+
+
+class JSONLWriter:
+    def __init__(self, output_file, append=False, fsync_every=10):
+        """
+        Initialize JSONL writer
+
+        Args:
+            output_file: Path to .jsonl file
+            append: Keep existing records (resume) instead of truncating
+            fsync_every: Flush records to disk after this many writes
+        """
+        self.output_file = output_file
+        self.fsync_every = max(1, fsync_every)
+        self.pending = 0
+        self.count = 0
+
+        directory = os.path.dirname(output_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if append:
+            _truncate_partial_line(output_file)
+        self.file = open(output_file, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, record):
+        """Append one record as a JSON line"""
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.count += 1
+        self.pending += 1
+        if self.pending >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        """Flush buffered records and fsync them to disk"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _truncate_partial_line(path):
+    """Drop a half-written last line left by a crash"""
+    if not os.path.exists(path):
+        return
+
+    with open(path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+
+        # Scan backwards for the last newline
+        pos = size
+        while pos > 0:
+            step = min(64 * 1024, pos)
+            f.seek(pos - step)
+            block = f.read(step)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                end = pos - step + newline + 1
+                if end != size:
+                    f.truncate(end)
+                return
+            pos -= step
+        f.truncate(0)
+
+
+def iter_jsonl(path):
+    """
+    Stream records from a JSONL file, skipping a truncated last line
+
+    Args:
+        path: Path to .jsonl file
+
+    Yields:
+        dict: One record per line
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Interrupted write - everything before it is intact
+                break
+
+
+def iter_json_array(path, block_size=1 << 16):
+    """
+    Stream the items of a top-level JSON array without loading the whole file
+
+    Args:
+        path: Path to a file holding one JSON array
+        block_size: Characters read at a time
+
+    Yields:
+        Each decoded array item
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = f.read(block_size).lstrip()
+        if not buf.startswith('['):
+            raise ValueError(f"{path} does not contain a JSON array")
+        pos = 1
+        eof = False
+
+        while True:
+            # Skip separators between items
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf) and buf[pos] == ']':
+                return
+
+            try:
+                if pos >= len(buf):
+                    raise json.JSONDecodeError("Need more data", buf, pos)
+                item, end = decoder.raw_decode(buf, pos)
+                # A number could still continue in the next block ('1' of '1.5')
+                if not eof and (end == len(buf) or buf[end] not in ' \t\r\n,]'):
+                    raise json.JSONDecodeError("Need more data", buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Read at least as much again as the pending item, so a huge
+                # page is re-parsed a logarithmic number of times
+                more = f.read(max(block_size, len(buf) - pos))
+                eof = not more
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+
+            yield item
+            pos = end
+
+
+def iter_records(path):
+    """
+    Stream records from a .jsonl file or a JSON array file
+
+    Args:
+        path: Path to .jsonl or .json file
+
+    Yields:
+        dict: One record at a time
+    """
+    if path.endswith('.jsonl'):
+        yield from iter_jsonl(path)
+    else:
+        yield from iter_json_array(path)
+
+
+def iter_pages(path):
+    """
+    Stream scraped pages from a .jsonl file or a JSON array file
+
+    Args:
+        path: Path to scraped data
+
+    Yields:
+        dict: Page dicts
+    """
+    yield from iter_records(path)
+
+
+def load_done_urls(path):
+    """URLs already written to a JSONL file (for --resume)"""
+    if not os.path.exists(path):
+        return set()
+    return {record['url'] for record in iter_jsonl(path) if 'url' in record}
@@ -1,21 +1,57 @@
 """
 Document Processor - Chunks scraped content for RAG
 """
+import argparse
 import json
 import os
+import re
+from bisect import bisect_right
+
+from boilerplate import BoilerplateStripper
+from manifest import Manifest
+from near_duplicates import NearDuplicateDetector
+from page_store import JSONLWriter, iter_pages
+from token_budget import load_token_counter
+
+# '.', '!' or '?' followed by a space or newline
+_SENTENCE_END_RE = re.compile(r'[.!?](?=[ \n])')
 
 
 class DocumentProcessor:
-    def __init__(self, chunk_size=500, chunk_overlap=50):
+    def __init__(self, chunk_size=500, chunk_overlap=50, dedupe=False, dedupe_threshold=0.9,
+                 strip_boilerplate=False, boilerplate_threshold=0.05, chunk_unit='chars',
+                 tokenizer_name='sentence-transformers/all-MiniLM-L6-v2', max_tokens=256,
+                 token_overlap=32):
         """
         Initialize document processor
 
         Args:
             chunk_size: Size of each chunk in characters
             chunk_overlap: Overlap between chunks in characters
+            dedupe: Collapse near-duplicate pages before chunking
+            dedupe_threshold: Estimated Jaccard similarity for near-duplicates
+            strip_boilerplate: Remove blocks repeated across many pages before chunking
+            boilerplate_threshold: Share of pages a line must appear on to be boilerplate
+            chunk_unit: 'chars' (chunk_size characters) or 'tokens' (pack each chunk
+                        up to the embedding model's max_tokens)
+            tokenizer_name: Tokenizer of the embedding model, for 'tokens'
+            max_tokens: Embedding model input limit, including special tokens
+            token_overlap: Overlap between token chunks, in tokens (whole sentences/lines)
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.dedupe = dedupe
+        self.dedupe_threshold = dedupe_threshold
+        self.strip_boilerplate = strip_boilerplate
+        self.boilerplate_threshold = boilerplate_threshold
+        self.token_overlap = token_overlap
+
+        # Falls back to character chunks if transformers is missing
+        self.token_counter = None
+        if chunk_unit == 'tokens':
+            self.token_counter = load_token_counter(tokenizer_name, max_tokens)
+        self.chunk_unit = 'tokens' if self.token_counter else 'chars'
+        self.stats = {}
 
     def chunk_text(self, text, metadata):
         """
@@ -34,6 +70,9 @@ class DocumentProcessor:
         if len(text) == 0:
             return chunks
 
+        if self.token_counter:
+            return self.chunk_tokens(text, metadata)
+
         # If text is shorter than chunk size, return as single chunk
         if len(text) <= self.chunk_size:
             chunks.append({
@@ -42,36 +81,31 @@ class DocumentProcessor:
             })
             return chunks
 
+        # Every sentence end ('. ', '.\n', '! ', ...) found in one pass;
+        # cut points are then picked by binary search
+        boundaries = [match.start() for match in _SENTENCE_END_RE.finditer(text)]
+
         # Split into chunks with overlap
         start = 0
         while start < len(text):
             end = start + self.chunk_size
 
-            # Try to break at sentence boundary
+            # Try to break at the last sentence end in (start + chunk_size // 2, end]
             if end < len(text):
-                # Look for sentence end
-                sentence_ends = ['. ', '.\n', '! ', '!\n', '? ', '?\n']
-                best_break = end
-
-                for i in range(end, max(start + self.chunk_size // 2, start), -1):
-                    for ending in sentence_ends:
-                        if text[i:i+len(ending)] == ending:
-                            best_break = i + len(ending)
-                            break
-                    if best_break != end:
-                        break
-
-                end = best_break
+                idx = bisect_right(boundaries, end) - 1
+                # A sentence end at end - 2 would break exactly at end, which
+                # counts as "not found", so the search carries on before it
+                if idx >= 0 and boundaries[idx] == end - 2:
+                    idx -= 1
+                if idx >= 0 and boundaries[idx] > start + self.chunk_size // 2:
+                    end = boundaries[idx] + 2
 
             chunk_text = text[start:end].strip()
 
             if chunk_text:
                 chunks.append({
                     'content': chunk_text,
-                    'metadata': {
-                        **metadata,
-                        'chunk_index': len(chunks)
-                    }
+                    'metadata': dict(metadata, chunk_index=len(chunks))
                 })
 
             # Move start position with overlap
@@ -79,19 +113,124 @@ class DocumentProcessor:
 
         return chunks
 
-    def process_documents(self, scraped_data):
+    def chunk_tokens(self, text, metadata):
+        """
+        Split stripped text into chunks packed up to the model's token budget
+
+        Sentences and lines are packed whole, so chunks end on natural
+        boundaries; only a unit longer than the budget is split by words.
+
+        Args:
+            text: Stripped, non-empty text to chunk
+            metadata: Metadata dict to attach to each chunk
+
+        Returns:
+            list: List of chunk dicts (with 'token_count' in metadata)
         """
-        Process all scraped documents into chunks
+        budget = self.token_counter.budget
+        units = self.token_counter.units(text)
+
+        total = sum(tokens for _, _, tokens in units)
+        if total <= budget:
+            return [{'content': text, 'metadata': dict(metadata, token_count=total)}]
+
+        chunks = []
+        i = 0
+        while i < len(units):
+            # Every unit fits the budget, so each chunk takes at least one
+            j, tokens = i, 0
+            while j < len(units) and tokens + units[j][2] <= budget:
+                tokens += units[j][2]
+                j += 1
+
+            chunk_text = text[units[i][0]:units[j - 1][1]].strip()
+            if chunk_text:
+                chunks.append({
+                    'content': chunk_text,
+                    'metadata': dict(metadata, chunk_index=len(chunks), token_count=tokens)
+                })
+
+            if j == len(units):
+                break
+
+            # Carry trailing units into the next chunk, but always move forward
+            k, carried = j, 0
+            while k - 1 > i and carried + units[k - 1][2] <= self.token_overlap:
+                k -= 1
+                carried += units[k][2]
+            i = k
+
+        return chunks
+
+    def fit(self, pages):
+        """
+        First pass over the corpus: near-duplicate fingerprints and boilerplate line counts
+
+        Lines of near-duplicate pages are not counted, so templated copies
+        do not make their own text look like boilerplate.
 
         Args:
-            scraped_data: List of scraped page dicts
+            pages: Iterable of scraped page dicts
 
         Returns:
-            list: List of all chunks
+            tuple: (NearDuplicateDetector or None, BoilerplateStripper or None)
         """
-        all_chunks = []
+        detector = NearDuplicateDetector(threshold=self.dedupe_threshold) if self.dedupe else None
+        stripper = BoilerplateStripper(threshold=self.boilerplate_threshold) if self.strip_boilerplate else None
+
+        for page in pages:
+            if detector and detector.add(page['url'], page['content']):
+                continue
+            if stripper:
+                stripper.add(page['content'])
+
+        return detector, stripper
+
+    def process_documents(self, scraped_data, detector=None, stripper=None, manifest=None):
+        """
+        Process scraped documents into chunks, one page at a time
+
+        Stats are complete once the generator is exhausted.
+
+        Args:
+            scraped_data: List (or iterable) of scraped page dicts
+            detector: Already-fitted NearDuplicateDetector
+            stripper: Already-fitted BoilerplateStripper; both are fitted on
+                      scraped_data here if enabled and neither is given
+                      (which needs scraped_data to be re-iterable)
+            manifest: Manifest recording page and chunk hashes, for
+                      incremental embedding
+
+        Yields:
+            dict: Chunk dicts
+
+        Raises:
+            TypeError: If fitting is needed but scraped_data is a one-shot
+                       iterator (fit() would exhaust it)
+        """
+        self.stats = {'pages': 0, 'duplicate_pages': 0, 'chunks_saved': 0,
+                      'chars': 0, 'boilerplate_chars': 0, 'boilerplate_chunks_saved': 0}
+
+        if (self.dedupe or self.strip_boilerplate) and detector is None and stripper is None:
+            if iter(scraped_data) is scraped_data:
+                raise TypeError("dedupe / strip_boilerplate need two passes over scraped_data: "
+                                "pass a list, or fit() first and pass detector / stripper")
+            detector, stripper = self.fit(scraped_data)
+
+        kept_chars = 0
+        chunk_count = 0
 
         for page in scraped_data:
+            self.stats['pages'] += 1
+
+            # Near-duplicate: its URL is kept as an alias of the canonical page
+            if detector and detector.is_duplicate(page['url']):
+                self.stats['duplicate_pages'] += 1
+                self.stats['chunks_saved'] += len(self.chunk_text(page['content'], {}))
+                if manifest:
+                    manifest.record(page, [])
+                continue
+
             metadata = {
                 'url': page['url'],
                 'title': page['title'],
@@ -99,56 +238,145 @@ class DocumentProcessor:
                 'scraped_at': page.get('scraped_at', '')
             }
 
-            chunks = self.chunk_text(page['content'], metadata)
-            all_chunks.extend(chunks)
+            aliases = detector.aliases(page['url']) if detector else []
+            if aliases:
+                metadata['aliases'] = aliases
+
+            content = page['content']
+            self.stats['chars'] += len(content)
+            if stripper:
+                stripped = stripper.strip(content)
+                self.stats['boilerplate_chars'] += len(content) - len(stripped)
+                content = stripped
+
+            chunks = self.chunk_text(content, metadata)
+            kept_chars += len(content)
+            chunk_count += len(chunks)
+            if manifest:
+                manifest.record(page, chunks)
+            yield from chunks
+
+        # Estimated at the corpus's own characters per chunk, rather than
+        # chunking every stripped page twice more just for this stat
+        if kept_chars:
+            self.stats['boilerplate_chunks_saved'] = round(
+                self.stats['boilerplate_chars'] * chunk_count / kept_chars
+            )
+
+    def process_file(self, input_file, manifest=None):
+        """
+        Process scraped data read incrementally from a .jsonl or .json file
+
+        With dedupe or boilerplate stripping on, the file is read twice
+        (fit, then chunks) so pages never need to be held in memory together.
 
-        return all_chunks
+        Args:
+            input_file: Path to scraped data
+            manifest: Manifest recording page and chunk hashes
 
-    def save_chunks(self, chunks, output_file):
+        Yields:
+            dict: Chunk dicts
         """
-        Save chunks to JSON file
+        detector, stripper = None, None
+        if self.dedupe or self.strip_boilerplate:
+            detector, stripper = self.fit(iter_pages(input_file))
 
-        Args:
-            chunks: List of chunk dicts
-            output_file: Path to output file
+        yield from self.process_documents(iter_pages(input_file), detector=detector, stripper=stripper,
+                                          manifest=manifest)
+
+    def save_chunks(self, chunks, output_file):
         """
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        Write chunks to disk as they are produced
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(chunks, f, indent=2, ensure_ascii=False)
+        Args:
+            chunks: Iterable of chunk dicts
+            output_file: .jsonl (one chunk per line) or .json (array) file
 
-        print(f"💾 Saved {len(chunks)} chunks to: {output_file}")
+        Returns:
+            int: Number of chunks written
+        """
+        if output_file.endswith('.jsonl'):
+            with JSONLWriter(output_file, fsync_every=1000) as sink:
+                for chunk in chunks:
+                    sink.write(chunk)
+            count = sink.count
+        else:
+            directory = os.path.dirname(output_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            count = 0
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write('[')
+                for chunk in chunks:
+                    f.write(',\n' if count else '\n')
+                    f.write(json.dumps(chunk, ensure_ascii=False))
+                    count += 1
+                f.write('\n]\n')
+
+        print(f"💾 Saved {count} chunks to: {output_file}")
+        return count
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunk data/scraped_data.jsonl into data/knowledge_base.jsonl")
+    parser.add_argument('--chunk-unit', choices=['chars', 'tokens'], default='chars',
+                        help="chars: 500-character chunks (default); tokens: pack chunks up to the "
+                             "embedding model's 256-token window (needs transformers, "
+                             "else falls back to chars)")
+    parser.add_argument('--dedupe', action='store_true', help="Collapse near-duplicate pages")
+    parser.add_argument('--strip-boilerplate', action='store_true',
+                        help="Remove line blocks repeated on many pages")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("  DOCUMENT PROCESSOR")
     print("=" * 60)
 
-    # Load scraped data
-    input_file = 'data/scraped_data.json'
+    # Scraped data: JSONL from run_scraper.py, or the older JSON array
+    input_file = 'data/scraped_data.jsonl'
+    if not os.path.exists(input_file):
+        input_file = 'data/scraped_data.json'
     print(f"\n📂 Loading: {input_file}")
 
-    try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            scraped_data = json.load(f)
-    except FileNotFoundError:
+    if not os.path.exists(input_file):
         print(f"❌ File not found: {input_file}")
         print("💡 Run scraper first: python run_scraper.py")
         exit(1)
 
-    print(f"✓ Loaded {len(scraped_data)} pages")
-
     # Process into chunks
-    processor = DocumentProcessor(chunk_size=500, chunk_overlap=50)
-    print(f"\n🔪 Chunking documents (size={processor.chunk_size}, overlap={processor.chunk_overlap})...")
-
-    chunks = processor.process_documents(scraped_data)
-    print(f"✓ Created {len(chunks)} chunks")
-
-    # Save
-    output_file = 'data/knowledge_base.json'
-    processor.save_chunks(chunks, output_file)
+    processor = DocumentProcessor(chunk_size=500, chunk_overlap=50, dedupe=args.dedupe,
+                                  strip_boilerplate=args.strip_boilerplate, chunk_unit=args.chunk_unit)
+    if processor.token_counter:
+        print(f"\n🔪 Chunking documents (up to {processor.token_counter.budget} tokens, "
+              f"overlap={processor.token_overlap} tokens)...")
+    else:
+        print(f"\n🔪 Chunking documents (size={processor.chunk_size}, overlap={processor.chunk_overlap})...")
+
+    # Chunks stream straight to disk; memory is bounded by the largest page
+    output_file = 'data/knowledge_base.jsonl'
+    manifest = Manifest('data/manifest.json')
+    count = processor.save_chunks(processor.process_file(input_file, manifest=manifest), output_file)
+    print(f"✓ Loaded {processor.stats['pages']} pages")
+    print(f"✓ Created {count} chunks")
+
+    # Compared with the last run; generate_embeddings.py re-encodes only new chunk text
+    print(f"✓ Pages: {manifest.stats['new']} new, {manifest.stats['changed']} changed, "
+          f"{manifest.stats['unchanged']} unchanged, {len(manifest.deleted())} deleted "
+          f"({len(manifest.new_chunk_hashes())} new chunk texts)")
+    manifest.save()
+
+    if processor.dedupe:
+        stats = processor.stats
+        print(f"✓ Collapsed {stats['duplicate_pages']}/{stats['pages']} near-duplicate pages "
+              f"(saved {stats['chunks_saved']} chunks and embedding computations)")
+
+    if processor.strip_boilerplate:
+        stats = processor.stats
+        saved = stats['boilerplate_chunks_saved']
+        share = saved / (count + saved) if count else 0
+        print(f"✓ Stripped {stats['boilerplate_chars']:,}/{stats['chars']:,} boilerplate characters, "
+              f"saving ~{saved} chunks (~{share:.0%} less embedding time)")
 
     print(f"\n✅ Processing completed!")
     print(f"\n📌 Next step: python generate_embeddings.py")
@@ -0,0 +1,221 @@
+"""
+Quantization - int8 and 1-bit embedding codes with full-precision rescoring
+
+Both indexes follow the ann_index.py interface (build / search / save /
+load), so Retriever uses them like any ANN index: the compact codes pick
+candidates and, by default, those candidates are rescored against the
+full-precision (memory-mapped) matrix.
+"""
+import json
+
+import numpy as np
+
+from ann_index import matrix_hash, top_k
+
+# Rows decoded / compared at a time, so scoring never materializes a
+# float copy of the whole code matrix
+_SCORE_BLOCK = 65536
+
+# Popcount of every byte value, for numpy without bitwise_count
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount_rows(bits):
+    """Set bits per row of a packed uint8 array"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bits).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[bits].sum(axis=1, dtype=np.int32)
+
+
+class _RescoringIndex:
+    """Candidate selection from codes, then exact rescoring"""
+
+    def __init__(self, oversample, rescore):
+        self.oversample = oversample
+        self.rescore = rescore
+        self.matrix = None
+        self.fingerprint = None
+
+    def search(self, queries, k=3, oversample=None, rescore=None):
+        """
+        Top-k by inner product: approximate from codes, optionally rescored
+
+        Args:
+            queries: (queries, dim) unit vectors
+            k: Results per query
+            oversample: Candidates per result taken from the codes before
+                        rescoring (default: self.oversample)
+            rescore: Rescore candidates against full-precision vectors
+                     (default: self.rescore); if off, code scores are returned
+
+        Returns:
+            tuple: (row indices, scores), each (queries, k) best first
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.matrix.shape[1])
+        rescore = self.rescore if rescore is None else rescore
+        k = min(k, len(self.matrix))
+        candidates = k * (oversample or self.oversample) if rescore else k
+
+        approx = self._approximate_scores(queries)
+        rows = top_k(approx, min(candidates, len(self.matrix)))
+        if not rescore:
+            return rows, np.take_along_axis(approx, rows, axis=1)
+
+        # Only the candidate rows of the float matrix are read
+        exact = np.einsum('qcd,qd->qc', self.matrix[rows], queries)
+        best = top_k(exact, k)
+        return np.take_along_axis(rows, best, axis=1), np.take_along_axis(exact, best, axis=1)
+
+    def _approximate_scores(self, queries):
+        raise NotImplementedError
+
+    @property
+    def code_bytes(self):
+        """Memory held by the codes and their parameters"""
+        raise NotImplementedError
+
+
+class Int8Index(_RescoringIndex):
+    kind = 'int8'
+
+    def __init__(self, oversample=4, rescore=True):
+        """
+        Initialize int8 scalar-quantized index
+
+        Each dimension is mapped linearly from its [min, max] over the
+        matrix onto the 256 int8 values (4x smaller than float32).
+
+        Args:
+            oversample: Candidates per result rescored exactly
+            rescore: Rescore candidates against full-precision vectors
+        """
+        super().__init__(oversample, rescore)
+        self.codes = None
+        self.scale = None
+        self.offset = None
+
+    def build(self, matrix):
+        """
+        Quantize the matrix
+
+        Args:
+            matrix: (rows, dim) unit vectors (kept, unquantized, for rescoring)
+        """
+        self.matrix = np.asarray(matrix, dtype=np.float32)
+        low = self.matrix.min(axis=0)
+        high = self.matrix.max(axis=0)
+        self.scale = np.maximum(high - low, 1e-12) / 255
+        # x ~= (code + 128) * scale + low
+        self.offset = low + 128 * self.scale
+        self.codes = np.empty(self.matrix.shape, dtype=np.int8)
+        for start in range(0, len(self.matrix), _SCORE_BLOCK):
+            block = self.matrix[start:start + _SCORE_BLOCK]
+            self.codes[start:start + len(block)] = np.clip(
+                np.rint((block - self.offset) / self.scale), -128, 127)
+        self.fingerprint = matrix_hash(self.matrix)
+        return self
+
+    def _approximate_scores(self, queries):
+        # q . x ~= (q * scale) . code + q . offset
+        scaled = (queries * self.scale).T
+        bias = queries @ self.offset
+        scores = np.empty((len(queries), len(self.codes)), dtype=np.float32)
+        for start in range(0, len(self.codes), _SCORE_BLOCK):
+            block = self.codes[start:start + _SCORE_BLOCK].astype(np.float32)
+            scores[:, start:start + len(block)] = (block @ scaled).T
+        return scores + bias[:, None]
+
+    @property
+    def code_bytes(self):
+        return self.codes.nbytes + self.scale.nbytes + self.offset.nbytes
+
+    def save(self, path):
+        """Write codes and per-dimension parameters to an .npz file"""
+        np.savez(path, codes=self.codes, scale=self.scale, offset=self.offset,
+                 params=json.dumps({'oversample': self.oversample, 'rescore': self.rescore,
+                                    'fingerprint': self.fingerprint}))
+
+    @classmethod
+    def load(cls, path, matrix):
+        """Read an index saved by save(); matrix is the embedding matrix it quantizes"""
+        with np.load(path) as data:
+            params = json.loads(str(data['params']))
+            index = cls(oversample=params['oversample'], rescore=params['rescore'])
+            index.codes = data['codes']
+            index.scale = data['scale']
+            index.offset = data['offset']
+        index.matrix = np.asarray(matrix, dtype=np.float32)
+        index.fingerprint = params['fingerprint']
+        return index
+
+
+class BinaryIndex(_RescoringIndex):
+    kind = 'binary'
+
+    def __init__(self, oversample=10, rescore=True):
+        """
+        Initialize 1-bit sign-quantized index
+
+        Each dimension keeps only its sign relative to the corpus mean
+        (sentence embeddings share a large common component that would
+        otherwise fix many bits), packed 8 per byte: 32x smaller than
+        float32. Candidates are the rows at the smallest Hamming distance
+        from the query's bits.
+
+        Args:
+            oversample: Candidates per result rescored exactly
+            rescore: Rescore candidates against full-precision vectors
+        """
+        super().__init__(oversample, rescore)
+        self.bits = None
+        self.center = None
+
+    def build(self, matrix):
+        """
+        Quantize the matrix
+
+        Args:
+            matrix: (rows, dim) unit vectors (kept, unquantized, for rescoring)
+        """
+        self.matrix = np.asarray(matrix, dtype=np.float32)
+        self.center = self.matrix.mean(axis=0)
+        self.bits = np.empty((len(self.matrix), (self.matrix.shape[1] + 7) // 8), dtype=np.uint8)
+        for start in range(0, len(self.matrix), _SCORE_BLOCK):
+            block = self.matrix[start:start + _SCORE_BLOCK]
+            self.bits[start:start + len(block)] = np.packbits(block > self.center, axis=1)
+        self.fingerprint = matrix_hash(self.matrix)
+        return self
+
+    def _approximate_scores(self, queries):
+        # Fewer differing signs = more similar; rescaled to [-1, 1] like cosine
+        query_bits = np.packbits(queries > self.center, axis=1)
+        dim = self.matrix.shape[1]
+        scores = np.empty((len(queries), len(self.bits)), dtype=np.float32)
+        for q, bits in enumerate(query_bits):
+            for start in range(0, len(self.bits), _SCORE_BLOCK):
+                block = self.bits[start:start + _SCORE_BLOCK]
+                distance = popcount_rows(np.bitwise_xor(block, bits))
+                scores[q, start:start + len(block)] = 1 - 2 * distance / dim
+        return scores
+
+    @property
+    def code_bytes(self):
+        return self.bits.nbytes + self.center.nbytes
+
+    def save(self, path):
+        """Write packed sign bits and the centre to an .npz file"""
+        np.savez(path, bits=self.bits, center=self.center,
+                 params=json.dumps({'oversample': self.oversample, 'rescore': self.rescore,
+                                    'fingerprint': self.fingerprint}))
+
+    @classmethod
+    def load(cls, path, matrix):
+        """Read an index saved by save(); matrix is the embedding matrix it quantizes"""
+        with np.load(path) as data:
+            params = json.loads(str(data['params']))
+            index = cls(oversample=params['oversample'], rescore=params['rescore'])
+            index.bits = data['bits']
+            index.center = data['center']
+        index.matrix = np.asarray(matrix, dtype=np.float32)
+        index.fingerprint = params['fingerprint']
+        return index
@@ -0,0 +1,112 @@
+"""
+Query Cache - Two-level LRU/TTL cache for retrieval: query text -> embedding, embedding bucket -> results
+"""
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from vector_store import sidecar_path
+
+_SPACE_RE = re.compile(r'\s+')
+_EDGE_PUNCTUATION = ' \t\n.?!,;:'
+
+
+def normalize_query(text):
+    """Case-fold, collapse whitespace and trim edge punctuation ("Fees?" == "fees")"""
+    return _SPACE_RE.sub(' ', text.lower()).strip(_EDGE_PUNCTUATION)
+
+
+def store_version(store_file):
+    """Version of an embedding store; changes whenever the matrix or its sidecar is rewritten"""
+    stats = [os.stat(path) for path in (store_file, sidecar_path(store_file))]
+    return ':'.join(f"{stat.st_mtime_ns}-{stat.st_size}" for stat in stats)
+
+
+class LRUCache:
+    def __init__(self, max_entries=1024, ttl=None):
+        """
+        Initialize LRU cache
+
+        Args:
+            max_entries: Entries kept; the least recently used is evicted first
+            ttl: Seconds an entry stays valid (None: no expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Cached value, or None on a miss or an expired entry"""
+        entry = self.entries.get(key)
+        if entry is not None and (self.ttl is None or time.monotonic() - entry[1] <= self.ttl):
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        if entry is not None:
+            del self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self.entries[key] = (value, time.monotonic())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': round(self.hit_rate, 4)}
+
+
+class QueryCache:
+    def __init__(self, embedding_entries=4096, result_entries=4096, ttl=3600, bucket_scale=100):
+        """
+        Initialize two-level query cache
+
+        Level 1 maps normalized query text to its embedding, skipping the
+        encoder. Level 2 maps (embedding bucket, top_k, filter, knowledge
+        base version) to the result list, skipping the scan; a new
+        embeddings file gets a new version, so old results are never served.
+
+        Args:
+            embedding_entries: Query embeddings kept
+            result_entries: Result lists kept
+            ttl: Seconds entries stay valid (None: no expiry)
+            bucket_scale: Embedding components are rounded to 1/bucket_scale
+                          for the result key, so near-identical embeddings
+                          share results
+        """
+        self.embeddings = LRUCache(embedding_entries, ttl)
+        self.results = LRUCache(result_entries, ttl)
+        self.bucket_scale = bucket_scale
+
+    def bucket(self, vector):
+        """Key of the embedding bucket a (unit) query vector falls in"""
+        rounded = np.rint(np.asarray(vector, dtype=np.float32) * self.bucket_scale).astype(np.int16)
+        return hashlib.sha1(rounded.tobytes()).hexdigest()
+
+    def result_key(self, vector, top_k, version, *options):
+        """Level-2 key; options are any further search settings (filters, index knobs)"""
+        return (self.bucket(vector), top_k, version, *options)
+
+    def clear(self):
+        self.embeddings.clear()
+        self.results.clear()
+
+    def stats(self):
+        return {'embeddings': self.embeddings.stats(), 'results': self.results.stats()}
@@ -3,11 +3,69 @@
  * Loads embeddings and performs semantic search using Transformers.js
  */
 
+/**
+ * Bounded LRU map with per-entry expiry and hit counters
+ */
+class LRUCache {
+    constructor(maxEntries = 500, ttlMs = 60 * 60 * 1000) {
+        this.maxEntries = maxEntries;
+        this.ttlMs = ttlMs;
+        this.entries = new Map();
+        this.hits = 0;
+        this.misses = 0;
+    }
+
+    get(key) {
+        const entry = this.entries.get(key);
+        if (entry && Date.now() - entry.storedAt <= this.ttlMs) {
+            // Re-insert to mark as most recently used
+            this.entries.delete(key);
+            this.entries.set(key, entry);
+            this.hits++;
+            return entry.value;
+        }
+        if (entry) {
+            this.entries.delete(key);
+        }
+        this.misses++;
+        return undefined;
+    }
+
+    set(key, value) {
+        this.entries.delete(key);
+        this.entries.set(key, { value: value, storedAt: Date.now() });
+        while (this.entries.size > this.maxEntries) {
+            this.entries.delete(this.entries.keys().next().value);
+        }
+    }
+
+    stats() {
+        const total = this.hits + this.misses;
+        return {
+            entries: this.entries.size,
+            hits: this.hits,
+            misses: this.misses,
+            hitRate: total ? this.hits / total : 0
+        };
+    }
+}
+
 class RAGClient {
     constructor() {
         this.data = null;
+        this.vectors = null;
+        this.dim = 0;
         this.extractor = null;
         this.isReady = false;
+
+        // Query text -> embedding, and (embedding bucket, topK, version) -> results
+        this.embeddingCache = new LRUCache();
+        this.resultCache = new LRUCache();
+        this.version = '';
+
+        // Optional retrieval_server.py endpoint: nothing to download per tab
+        this.serverUrl = (typeof CONFIG !== 'undefined' && CONFIG.rag?.serverUrl) || '';
+        this.useServer = false;
     }
 
     /**
@@ -17,13 +75,16 @@ class RAGClient {
         try {
             console.log('🔧 Initializing RAG system...');
 
+            if (this.serverUrl && await this.checkServer()) {
+                this.useServer = true;
+                this.isReady = true;
+                console.log(`✅ RAG system ready (server: ${this.serverUrl})`);
+                return true;
+            }
+
             // Load embeddings data
             console.log('📂 Loading embeddings...');
-            const response = await fetch('data/embeddings.json');
-            if (!response.ok) {
-                throw new Error(`Failed to load embeddings: ${response.status}`);
-            }
-            this.data = await response.json();
+            await this.loadEmbeddings();
             console.log(`✓ Loaded ${this.data.chunks.length} chunks`);
 
             // Dynamically import Transformers.js
@@ -45,6 +106,149 @@ class RAGClient {
         }
     }
 
+    /**
+     * Check that the retrieval server answers
+     * @returns {boolean} True if /health responded
+     */
+    async checkServer() {
+        try {
+            const response = await fetch(`${this.serverUrl}/health`);
+            if (response.ok) {
+                return true;
+            }
+            console.warn(`⚠ Retrieval server returned ${response.status}, loading embeddings locally`);
+        } catch (error) {
+            console.warn('⚠ Retrieval server unreachable, loading embeddings locally:', error);
+        }
+        return false;
+    }
+
+    /**
+     * Search through the retrieval server
+     * @param {string} query - User query
+     * @param {number} topK - Number of results to return
+     * @returns {Array} Top K chunks with scores, as from search()
+     */
+    async searchServer(query, topK) {
+        const response = await fetch(`${this.serverUrl}/search`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ query: query, top_k: topK })
+        });
+        if (!response.ok) {
+            throw new Error(`Retrieval server error: ${response.status}`);
+        }
+        return response.json();
+    }
+
+    /**
+     * Load the binary embedding matrix and its chunk sidecar
+     * (data/embeddings.bin + data/embeddings.chunks.json), falling back
+     * to the older data/embeddings.json
+     */
+    async loadEmbeddings() {
+        const [matrixResponse, sidecarResponse] = await Promise.all([
+            fetch('data/embeddings.bin'),
+            fetch('data/embeddings.chunks.json')
+        ]);
+
+        if (!matrixResponse.ok || !sidecarResponse.ok) {
+            const response = await fetch('data/embeddings.json');
+            if (!response.ok) {
+                throw new Error(`Failed to load embeddings: ${matrixResponse.status}`);
+            }
+            this.data = await response.json();
+            this.dim = this.data.embedding_dim;
+            this.vectors = new Float32Array(this.data.embeddings.length * this.dim);
+            this.data.embeddings.forEach((embedding, idx) => this.vectors.set(embedding, idx * this.dim));
+            delete this.data.embeddings;
+            this.version = this.responseVersion(response, this.data.chunks.length);
+            return;
+        }
+
+        const [buffer, sidecar] = await Promise.all([matrixResponse.arrayBuffer(), sidecarResponse.json()]);
+        const { rows, dim, dtype } = this.parseHeader(buffer);
+        if (rows !== sidecar.count) {
+            throw new Error(`Embedding matrix has ${rows} rows, sidecar ${sidecar.count} chunks`);
+        }
+
+        this.data = sidecar;
+        this.dim = dim;
+        this.version = this.responseVersion(matrixResponse, rows);
+        this.vectors = dtype === 0
+            ? new Float32Array(buffer, RAGClient.HEADER_SIZE, rows * dim)
+            : RAGClient.halfToFloat(new Uint16Array(buffer, RAGClient.HEADER_SIZE, rows * dim));
+    }
+
+    /**
+     * Knowledge base version for result cache keys
+     * @param {Response} response - Embeddings file response
+     * @param {number} count - Number of chunks
+     * @returns {string} Changes when the embeddings file changes
+     */
+    responseVersion(response, count) {
+        const tag = response.headers?.get('ETag') || response.headers?.get('Last-Modified') || '';
+        return `${count}:${tag}`;
+    }
+
+    /**
+     * Normalize query text for the embedding cache ("Fees?" == "fees")
+     * @param {string} query - User query
+     * @returns {string} Cache key
+     */
+    static normalizeQuery(query) {
+        return query.toLowerCase().replace(/\s+/g, ' ').replace(/^[\s.?!,;:]+|[\s.?!,;:]+$/g, '');
+    }
+
+    /**
+     * Hit counters of both cache levels
+     * @returns {Object} Embedding and result cache stats
+     */
+    getCacheStats() {
+        return { embeddings: this.embeddingCache.stats(), results: this.resultCache.stats() };
+    }
+
+    /**
+     * Read the store header (see vector_store.py)
+     * @param {ArrayBuffer} buffer - Contents of embeddings.bin
+     * @returns {Object} rows, dim and dtype code (0 float32, 1 float16)
+     */
+    parseHeader(buffer) {
+        const view = new DataView(buffer);
+        const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+        if (magic !== 'EMBV' || view.getUint16(4, true) !== 1) {
+            throw new Error('Unsupported embeddings.bin format');
+        }
+        return {
+            dtype: view.getUint16(6, true),
+            rows: view.getUint32(8, true),
+            dim: view.getUint32(12, true)
+        };
+    }
+
+    /**
+     * Widen IEEE half-precision values to a Float32Array
+     * @param {Uint16Array} halves - Raw float16 bits
+     * @returns {Float32Array} Converted values
+     */
+    static halfToFloat(halves) {
+        const out = new Float32Array(halves.length);
+        for (let i = 0; i < halves.length; i++) {
+            const h = halves[i];
+            const sign = h & 0x8000 ? -1 : 1;
+            const exponent = (h >> 10) & 0x1f;
+            const fraction = h & 0x3ff;
+            if (exponent === 0) {
+                out[i] = sign * fraction * 2 ** -24;
+            } else if (exponent === 0x1f) {
+                out[i] = fraction ? NaN : sign * Infinity;
+            } else {
+                out[i] = sign * (1 + fraction / 1024) * 2 ** (exponent - 15);
+            }
+        }
+        return out;
+    }
+
     /**
      * Search for relevant chunks using semantic similarity
      * @param {string} query - User query
@@ -57,22 +261,43 @@ class RAGClient {
         }
 
         try {
-            // Generate query embedding
-            const queryEmbedding = await this.extractor(query, { pooling: 'mean', normalize: true });
+            if (this.useServer) {
+                const results = await this.searchServer(query, topK);
+                console.log(`🔍 Found ${results.length} relevant chunks for query:`, query);
+                return results;
+            }
+
+            // Generate query embedding (cached by normalized text)
+            const queryKey = RAGClient.normalizeQuery(query);
+            let queryEmbedding = this.embeddingCache.get(queryKey);
+            if (!queryEmbedding) {
+                queryEmbedding = (await this.extractor(query, { pooling: 'mean', normalize: true })).data;
+                this.embeddingCache.set(queryKey, queryEmbedding);
+            }
+
+            // Near-identical embeddings (rounded to 0.01) share results
+            const resultKey = `${Array.from(queryEmbedding, x => Math.round(x * 100)).join(',')}|${topK}|${this.version}`;
+            const cached = this.resultCache.get(resultKey);
+            if (cached) {
+                console.log(`🔍 Found ${cached.length} relevant chunks for query (cached):`, query);
+                return cached;
+            }
 
             // Calculate similarities
-            const similarities = this.data.embeddings.map((embedding, idx) => {
-                const similarity = this.cosineSimilarity(queryEmbedding.data, embedding);
+            const similarities = this.data.chunks.map((chunk, idx) => {
+                const embedding = this.vectors.subarray(idx * this.dim, (idx + 1) * this.dim);
+                const similarity = this.cosineSimilarity(queryEmbedding, embedding);
                 return {
                     index: idx,
                     score: similarity,
-                    chunk: this.data.chunks[idx]
+                    chunk: chunk
                 };
             });
 
             // Sort by similarity and get top K
             similarities.sort((a, b) => b.score - a.score);
             const topResults = similarities.slice(0, topK);
+            this.resultCache.set(resultKey, topResults);
 
             console.log(`🔍 Found ${topResults.length} relevant chunks for query:`, query);
             topResults.forEach((result, i) => {
@@ -114,3 +339,6 @@ class RAGClient {
         return dotProduct / (normA * normB);
     }
 }
+
+// Bytes before the matrix in embeddings.bin
+RAGClient.HEADER_SIZE = 32;
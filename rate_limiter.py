@@ -0,0 +1,69 @@
+"""
+Rate Limiter - Per-host token buckets for polite concurrent scraping
+"""
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=1):
+        """
+        Initialize token bucket
+
+        Args:
+            rate: Tokens added per second (0 or less disables limiting)
+            burst: Maximum tokens that can accumulate
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until it is available"""
+        if self.rate <= 0:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            # Reserve the token now so waiting threads are served in order
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    def __init__(self, rate, burst=1):
+        """
+        Initialize per-host rate limiter
+
+        Args:
+            rate: Requests per second allowed for each host
+            burst: Requests allowed back-to-back before throttling
+        """
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, host):
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    def set_rate(self, host, rate, burst=1):
+        """Override the rate for one host (e.g. from robots.txt Crawl-delay)"""
+        with self.lock:
+            self.buckets[host] = TokenBucket(rate, burst)
+
+    def wait(self, url):
+        """Block until a request to the URL's host is allowed"""
+        self._bucket(urlparse(url).netloc).acquire()
@@ -0,0 +1,225 @@
+"""
+Retrieval - Top-k chunk search over one L2-normalized embedding matrix
+"""
+import numpy as np
+
+from ann_index import load_index
+from query_cache import normalize_query, store_version
+from vector_store import read_vector_store
+
+
+def normalize_rows(vectors):
+    """L2-normalize rows as a new float32 array (zero rows stay zero)"""
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.maximum(norms, 1e-12)
+    return vectors
+
+
+def load_matrix(store_file):
+    """
+    Read an embedding store as the matrix Retriever searches
+
+    float32 unit vectors stay memory-mapped; anything else is normalized
+    into memory.
+
+    Args:
+        store_file: Binary embedding store
+
+    Returns:
+        tuple: (unit float32 matrix, sidecar dict)
+    """
+    vectors, sidecar = read_vector_store(store_file, mmap=True)
+    if sidecar.get('normalized', False) and sidecar['dtype'] == 'float32':
+        return vectors, sidecar
+    return normalize_rows(vectors), sidecar
+
+
+class Retriever:
+    def __init__(self, vectors, chunks, normalized=False, model=None, index=None, cache=None, version=None):
+        """
+        Initialize retriever
+
+        The matrix is held as contiguous float32 with unit rows, so cosine
+        similarity for any number of queries is one matrix multiply.
+
+        Args:
+            vectors: (chunks, dim) embeddings
+            chunks: Chunk dicts, one per row
+            normalized: Rows are already unit length (skips a normalizing copy)
+            model: Object with encode() (e.g. EmbeddingGenerator.model) for search_text
+            index: ANN or quantized index over the same matrix (see
+                   ann_index.py, quantization.py), used for unfiltered searches
+            cache: QueryCache for query embeddings and results (optional)
+            version: Knowledge base version in result cache keys
+        """
+        if len(vectors) != len(chunks):
+            raise ValueError(f"{len(chunks)} chunks but {len(vectors)} embeddings")
+
+        if normalized:
+            self.matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        else:
+            self.matrix = normalize_rows(vectors)
+        self.chunks = chunks
+        self.model = model
+        self.index = index
+        self.cache = cache
+        self.version = version
+        self.urls = [chunk['metadata'].get('url', '') for chunk in chunks]
+        self._prefix_rows = {}
+
+    @classmethod
+    def from_store(cls, store_file='data/embeddings.bin', model=None, use_index=True, cache=None):
+        """
+        Load a retriever from the output of generate_embeddings.py
+
+        Args:
+            store_file: Binary embedding store
+            model: Query encoder for search_text (optional)
+            use_index: Load the ANN index saved next to the store, if any
+            cache: QueryCache (optional); cached results are keyed by the
+                   store file's version
+
+        Returns:
+            Retriever
+        """
+        version = store_version(store_file)
+        matrix, sidecar = load_matrix(store_file)
+        index = load_index(store_file, matrix) if use_index else None
+        return cls(matrix, sidecar['chunks'], normalized=True, model=model, index=index,
+                   cache=cache, version=version)
+
+    def rows_with_prefix(self, url_prefix):
+        """Row indices of chunks whose URL starts with url_prefix (cached per prefix)"""
+        rows = self._prefix_rows.get(url_prefix)
+        if rows is None:
+            rows = np.fromiter((i for i, url in enumerate(self.urls) if url.startswith(url_prefix)),
+                               dtype=np.int64)
+            self._prefix_rows[url_prefix] = rows
+        return rows
+
+    def search(self, queries, top_k=3, url_prefix=None, where=None, exact=False, **index_params):
+        """
+        Find the chunks most similar to one or more query vectors
+
+        Unfiltered searches go through the ANN index when there is one;
+        filtered searches score their candidate rows exactly. With a cache,
+        results are reused for queries in the same embedding bucket
+        (searches with a `where` function are not cached).
+
+        Args:
+            queries: One query vector, or a (queries, dim) array
+            top_k: Results per query
+            url_prefix: Only chunks whose metadata URL starts with this
+            where: Only chunks for which where(metadata) is true
+            exact: Score every row even if there is an index
+            index_params: Per-query index knobs (ef for HNSW, nprobe for IVF,
+                          oversample / rescore for int8 and binary)
+
+        Returns:
+            list: For one query, [{'index', 'score', 'chunk'}, ...] best first;
+                  for a batch, one such list per query
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        single = queries.ndim == 1
+        queries = normalize_rows(queries)
+
+        if self.cache is None or where is not None:
+            results = self._search(queries, top_k, url_prefix, where, exact, index_params)
+            return results[0] if single else results
+
+        options = (url_prefix, exact, tuple(sorted(index_params.items())))
+        keys = [self.cache.result_key(query, top_k, self.version, *options) for query in queries]
+        results = [self.cache.results.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            found = self._search(queries[missing], top_k, url_prefix, where, exact, index_params)
+            for i, result in zip(missing, found):
+                results[i] = result
+                self.cache.results.put(keys[i], result)
+        return results[0] if single else results
+
+    def _search(self, queries, top_k, url_prefix, where, exact, index_params):
+        if self.index is not None and not exact and url_prefix is None and where is None:
+            indices, scores = self.index.search(queries, top_k, **index_params)
+            results = [
+                [{'index': int(i), 'score': float(score), 'chunk': self.chunks[i]}
+                 for i, score in zip(row_indices, row_scores) if i >= 0]
+                for row_indices, row_scores in zip(indices, scores)
+            ]
+            return results
+
+        rows = None
+        if url_prefix is not None:
+            rows = self.rows_with_prefix(url_prefix)
+        if where is not None:
+            candidates = range(len(self.chunks)) if rows is None else rows
+            rows = np.fromiter((i for i in candidates if where(self.chunks[i]['metadata'])), dtype=np.int64)
+
+        # Filtered searches score only the candidate rows
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        scores = queries @ matrix.T
+
+        return [self._top_k(row_scores, top_k, rows) for row_scores in scores]
+
+    def search_text(self, texts, top_k=3, url_prefix=None, where=None, exact=False, **index_params):
+        """
+        Embed query text with the model, then search
+
+        Args:
+            texts: One query string or a list of them
+            top_k, url_prefix, where, exact, index_params: As for search()
+
+        Returns:
+            list: As for search()
+        """
+        single = isinstance(texts, str)
+        vectors = self.embed([texts] if single else texts)
+        results = self.search(vectors, top_k, url_prefix, where, exact, **index_params)
+        return results[0] if single else results
+
+    def embed(self, texts):
+        """
+        Encode query texts, reusing cached embeddings of normalized text
+
+        Args:
+            texts: List of query strings
+
+        Returns:
+            np.ndarray: (len(texts), dim) query vectors
+        """
+        if self.model is None:
+            raise ValueError("Retriever has no model; pass query vectors to search()")
+        if self.cache is None:
+            return self.model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+
+        keys = [normalize_query(text) for text in texts]
+        vectors = [self.cache.embeddings.get(key) for key in keys]
+
+        # Encode each distinct uncached query once
+        todo = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None:
+                todo.setdefault(key, text)
+        if todo:
+            encoded = self.model.encode(list(todo.values()), batch_size=len(todo), convert_to_numpy=True)
+            for key, vector in zip(todo, encoded):
+                self.cache.embeddings.put(key, vector)
+            encoded = dict(zip(todo, encoded))
+            vectors = [encoded[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+        return np.stack(vectors)
+
+    def _top_k(self, scores, top_k, rows):
+        k = min(top_k, len(scores))
+        if k == 0:
+            return []
+
+        # argpartition finds the k best in O(n); only those k are sorted
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        results = []
+        for i in top:
+            index = int(i if rows is None else rows[i])
+            results.append({'index': index, 'score': float(scores[i]), 'chunk': self.chunks[index]})
+        return results
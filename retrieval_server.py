@@ -0,0 +1,323 @@
+"""
+Retrieval Server - Local asyncio HTTP search service with request micro-batching
+
+The model and embedding matrix are loaded once. Concurrent /search requests
+are coalesced into micro-batches: one encode() call for all their queries,
+then one matrix multiply per URL-prefix group.
+
+Usage: python retrieval_server.py [--port 8000] [--max-batch-size 32] [--max-wait-ms 5]
+
+    POST /search  {"query": "...", "top_k": 3, "url_prefix": null}
+    GET  /search?q=...&top_k=3
+    GET  /health
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from query_cache import QueryCache, store_version
+from retrieval import Retriever
+
+# Largest request body accepted (queries are short)
+_MAX_BODY = 64 * 1024
+
+
+class MicroBatcher:
+    def __init__(self, process_batch, max_batch_size=32, max_wait_ms=5):
+        """
+        Initialize micro-batcher
+
+        Requests wait at most max_wait_ms for others to join their batch;
+        while a batch is being processed, new requests queue up and form the
+        next one, so batches grow with load.
+
+        Args:
+            process_batch: Blocking function mapping a list of items to a list
+                           of results (run on a worker thread); an exception
+                           in place of a result fails only that item
+            max_batch_size: Most items per batch
+            max_wait_ms: Longest a batch waits to fill after its first item
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.task = None
+
+        self.batches = 0
+        self.items = 0
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, item):
+        """Queue an item and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.process_batch, items)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(items)
+            for (_, future), result in zip(batch, results):
+                # The client may have gone away (cancelled future)
+                if future.done():
+                    continue
+                # process_batch may fail single items by returning their exception
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    @property
+    def mean_batch_size(self):
+        return self.items / self.batches if self.batches else 0.0
+
+
+class RetrievalServer:
+    def __init__(self, retriever, max_batch_size=32, max_wait_ms=5, max_top_k=20, store_file=None):
+        """
+        Initialize retrieval server
+
+        Args:
+            retriever: Retriever with a model (see retrieval.py)
+            max_batch_size: Most queries encoded and scored together
+            max_wait_ms: Longest a query waits for others to batch with
+            max_top_k: Largest top_k a request may ask for
+            store_file: Embedding store to reload when it is rewritten
+                        (its new version also retires cached results)
+        """
+        self.retriever = retriever
+        self.store_file = store_file
+        self.max_top_k = max_top_k
+        self.batcher = MicroBatcher(self.search_batch, max_batch_size, max_wait_ms)
+        self.started = time.time()
+
+    def search_batch(self, requests):
+        """
+        Answer a batch of search requests
+
+        Args:
+            requests: List of (query, top_k, url_prefix)
+
+        Returns:
+            list: One result list per request, as Retriever.search returns,
+                  or the exception that failed the request's filter group
+        """
+        self._reload_if_changed()
+        vectors = self.retriever.embed([query for query, _, _ in requests])
+
+        # One scoring pass per distinct filter, at the largest top_k asked
+        groups = {}
+        for i, (_, _, url_prefix) in enumerate(requests):
+            groups.setdefault(url_prefix, []).append(i)
+
+        results = [None] * len(requests)
+        for url_prefix, members in groups.items():
+            top_k = max(requests[i][1] for i in members)
+            try:
+                found = self.retriever.search(vectors[members], top_k=top_k, url_prefix=url_prefix)
+            except Exception as e:
+                # Other groups in the batch still get their results
+                for i in members:
+                    results[i] = e
+                continue
+            for i, result in zip(members, found):
+                results[i] = result[:requests[i][1]]
+        return results
+
+    def _reload_if_changed(self):
+        if self.store_file is None:
+            return
+        try:
+            if store_version(self.store_file) == self.retriever.version:
+                return
+            retriever = self.retriever
+            self.retriever = Retriever.from_store(self.store_file, model=retriever.model,
+                                                  cache=retriever.cache)
+            print(f"🔄 Reloaded {len(self.retriever.chunks)} chunks from {self.store_file}")
+        except (OSError, ValueError) as e:
+            # Mid-rewrite (matrix and sidecar disagree): keep serving the old one
+            print(f"⚠ Could not reload {self.store_file}: {e}")
+
+    async def handle(self, reader, writer):
+        """Serve HTTP/1.1 requests on one (keep-alive) connection"""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                if isinstance(body, int):
+                    # Body left unread, so the connection can't be reused
+                    message = 'request body too large' if body == 413 else 'invalid Content-Length'
+                    await self._respond(writer, body, {'error': message}, False)
+                    break
+                status, payload = await self._route(method, target, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """(method, target, headers, body), with an error status as the body if it can't be read"""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            return None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            return method, target, headers, 400
+        if length < 0:
+            return method, target, headers, 400
+        if length > _MAX_BODY:
+            return method, target, headers, 413
+        body = await reader.readexactly(length) if length else b''
+        return method, target, headers, body
+
+    async def _route(self, method, target, body):
+        url = urlsplit(target)
+        if method == 'OPTIONS':
+            return 204, None
+        if url.path == '/health' and method == 'GET':
+            return 200, {
+                'status': 'ok',
+                'chunks': len(self.retriever.chunks),
+                'uptime': round(time.time() - self.started, 1),
+                'requests': self.batcher.items,
+                'batches': self.batcher.batches,
+                'mean_batch_size': round(self.batcher.mean_batch_size, 2),
+                'cache': self.retriever.cache.stats() if self.retriever.cache else None
+            }
+        if url.path != '/search':
+            return 404, {'error': 'not found'}
+
+        try:
+            if method == 'POST':
+                params = json.loads(body or b'{}')
+            elif method == 'GET':
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                params['query'] = params.pop('q', params.get('query'))
+            else:
+                return 405, {'error': 'method not allowed'}
+            query = params.get('query')
+            top_k = params.get('top_k', 3)
+            url_prefix = params.get('url_prefix') or None
+        except (ValueError, TypeError, AttributeError):
+            return 400, {'error': 'invalid request'}
+
+        if not isinstance(query, str) or not query.strip():
+            return 400, {'error': "'query' is required"}
+        if url_prefix is not None and not isinstance(url_prefix, str):
+            return 400, {'error': "'url_prefix' must be a string"}
+        # JSON integers (not booleans or fractions), or digits from a query string
+        if isinstance(top_k, str) and top_k.strip().isdigit():
+            top_k = int(top_k)
+        if isinstance(top_k, bool) or not isinstance(top_k, int):
+            return 400, {'error': "'top_k' must be an integer"}
+        if not 1 <= top_k <= self.max_top_k:
+            return 400, {'error': f"'top_k' must be between 1 and {self.max_top_k}"}
+
+        try:
+            return 200, await self.batcher.submit((query, top_k, url_prefix))
+        except Exception as e:
+            print(f"❌ Search failed: {e}")
+            return 500, {'error': 'search failed'}
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        reasons = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+                   405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+        body = b'' if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {reasons[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Access-Control-Allow-Origin: *\r\n"
+            f"Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+            f"Access-Control-Allow-Headers: Content-Type\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        """Run until cancelled"""
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"🚀 Serving {len(self.retriever.chunks)} chunks on http://{host}:{port} "
+              f"(batches of up to {self.batcher.max_batch_size}, "
+              f"{self.batcher.max_wait * 1000:g} ms wait)")
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve /search over data/embeddings.bin")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--store', default='data/embeddings.bin', help="Embedding store")
+    parser.add_argument('--model', default='all-MiniLM-L6-v2', help="Query encoder (same as the store's)")
+    parser.add_argument('--backend', choices=['torch', 'onnx', 'onnx-int8'], default='torch')
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    parser.add_argument('--cache-size', type=int, default=4096,
+                        help="Query embeddings and result lists cached (0: no cache)")
+    parser.add_argument('--cache-ttl', type=float, default=3600, help="Seconds cache entries stay valid")
+    args = parser.parse_args()
+
+    from generate_embeddings import EmbeddingGenerator
+
+    generator = EmbeddingGenerator(args.model, backend=args.backend)
+    cache = QueryCache(args.cache_size, args.cache_size, args.cache_ttl) if args.cache_size else None
+    retriever = Retriever.from_store(args.store, model=generator.model, cache=cache)
+    # Warm up the encoder so the first request does not pay for it
+    generator.model.encode(['warm up'], convert_to_numpy=True)
+
+    server = RetrievalServer(retriever, args.max_batch_size, args.max_wait_ms, store_file=args.store)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
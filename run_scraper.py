@@ -1,25 +1,32 @@
 """
 Run Smart Scraper - Easy CLI to scrape college websites
 """
-import json
-import sys
+import argparse
+from page_store import JSONLWriter, load_done_urls
 from smart_scraper import SmartScraper, load_config
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape a college website into data/scraped_data.jsonl")
+    parser.add_argument('config', nargs='?', default='scraper_config.json',
+                        help="Config file (default: scraper_config.json)")
+    parser.add_argument('--output', default='data/scraped_data.jsonl',
+                        help="JSONL output file (default: data/scraped_data.jsonl)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Keep pages already in the output file and scrape only the rest")
+    parser.add_argument('--offline', action='store_true',
+                        help="Replay responses from the HTTP cache without touching the network")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("  SMART COLLEGE WEBSITE SCRAPER")
     print("=" * 60)
 
-    # Check if config file provided
-    if len(sys.argv) > 1:
-        config_file = sys.argv[1]
-        print(f"\n📋 Loading config from: {config_file}")
-        config = load_config(config_file)
-    else:
-        # Use default config
-        print(f"\n📋 Using scraper_config.json")
-        config = load_config('scraper_config.json')
+    print(f"\n📋 Loading config from: {args.config}")
+    config = load_config(args.config)
+    if args.offline:
+        config.setdefault('http_cache', {})['offline'] = True
+        print("📴 Offline: serving responses from the HTTP cache only")
 
     base_url = config.get('base_url')
     print(f"🌐 Target website: {base_url}")
@@ -27,13 +34,17 @@ def main():
     # Create scraper
     scraper = SmartScraper(base_url, config)
 
-    # Scrape
-    pages = scraper.scrape_all()
+    # Pages already saved by an interrupted run
+    done_urls = load_done_urls(args.output) if args.resume else set()
+
+    # Scrape, streaming each page to disk as soon as it is done
+    with JSONLWriter(args.output, append=args.resume) as sink:
+        scraper.scrape_all(sink=sink, skip_urls=done_urls)
 
-    # Save
-    if pages:
-        output_file = 'data/scraped_data.json'
-        scraper.save_to_file(output_file)
+    if scraper.page_count or done_urls:
+        print(f"\n💾 Saved to: {args.output}")
+        print(f"📊 Total pages: {scraper.page_count + len(done_urls)}")
+        print(f"📝 Words scraped this run: {scraper.word_count:,}")
         print("\n✅ Scraping completed successfully!")
         print(f"\n📌 Next steps:")
         print(f"   1. Run: python process_documents.py")
@@ -4,24 +4,48 @@ Sitemap Parser - Automatically discovers and parses sitemap.xml files
 import requests
 import xml.etree.ElementTree as ET
 from urllib.parse import urljoin, urlparse
-import gzip
-from io import BytesIO
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _local_name(tag):
+    """Strip XML namespace from a tag"""
+    return tag.rsplit('}', 1)[-1]
+
 
 class SitemapParser:
-    def __init__(self, base_url, timeout=10):
+    def __init__(self, base_url, timeout=10, max_workers=4, queue_size=1000,
+                 cache_file=None, cache_ttl=86400, session=None):
         """
         Initialize sitemap parser
 
         Args:
             base_url: Base URL of the website (e.g., "https://example.com")
             timeout: Request timeout in seconds
+            max_workers: Nested sitemaps fetched in parallel
+            queue_size: URLs buffered per nested sitemap ahead of the reader
+            cache_file: JSON file caching discovered sitemaps and Crawl-delay
+            cache_ttl: Seconds before a cached discovery result expires
+            session: requests.Session to reuse (e.g. the scraper's, with its response cache)
         """
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.max_workers = max(1, max_workers)
+        self.queue_size = queue_size
+        self.cache_file = cache_file
+        self.cache_ttl = cache_ttl
+        self.crawl_delay = None
+        self.session = session
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            })
 
     def discover_sitemap(self):
         """
@@ -30,6 +54,25 @@ class SitemapParser:
         Returns:
             str: Sitemap URL if found, None otherwise
         """
+        sitemaps = self.discover_sitemaps()
+        return sitemaps[0] if sitemaps else None
+
+    def discover_sitemaps(self):
+        """
+        Discover all sitemap URLs, probing common locations and robots.txt in parallel
+
+        Results are cached on disk (see cache_file / cache_ttl) together
+        with the robots.txt Crawl-delay, so repeat runs skip the probes.
+
+        Returns:
+            list: Sitemap URLs (first common location found, then robots.txt entries)
+        """
+        cached = self._load_cached_discovery()
+        if cached is not None:
+            self.crawl_delay = cached.get('crawl_delay')
+            print(f"✓ Using cached sitemap discovery ({len(cached['sitemaps'])} sitemaps)")
+            return cached['sitemaps']
+
         # Common sitemap locations
         common_locations = [
             '/sitemap.xml',
@@ -38,30 +81,125 @@ class SitemapParser:
             '/sitemap.xml.gz',
             '/wp-sitemap.xml',  # WordPress
         ]
+        candidates = [urljoin(self.base_url, path) for path in common_locations]
+
+        # Probe everything at once - total wait is one timeout, not six
+        with ThreadPoolExecutor(max_workers=len(candidates) + 1) as executor:
+            robots_future = executor.submit(self._fetch_robots)
+            probes = [executor.submit(self._check_url_exists, url) for url in candidates]
+
+            found = [url for url, probe in zip(candidates, probes) if probe.result()]
+            robots = robots_future.result()
+
+        sitemaps = []
+        if found:
+            print(f"✓ Found sitemap at: {found[0]}")
+            sitemaps.append(found[0])
+
+        if robots:
+            self.crawl_delay = robots['crawl_delay']
+            for sitemap_url in robots['sitemaps']:
+                if sitemap_url not in sitemaps:
+                    print(f"✓ Found sitemap in robots.txt: {sitemap_url}")
+                    sitemaps.append(sitemap_url)
+
+            # Only cache when robots.txt gave a definite answer (200, 404 or 410)
+            self._save_cached_discovery(sitemaps, self.crawl_delay)
 
-        # Try common locations first
-        for path in common_locations:
-            url = urljoin(self.base_url, path)
-            if self._check_url_exists(url):
-                print(f"✓ Found sitemap at: {url}")
-                return url
+        if not sitemaps:
+            print(f"⚠ No sitemap found for {self.base_url}")
+        return sitemaps
 
-        # Try robots.txt
+    def _fetch_robots(self):
+        """
+        Fetch robots.txt and extract Sitemap entries and Crawl-delay
+
+        Returns:
+            dict: sitemaps and crawl_delay (empty if the site has no robots.txt),
+                  or None if robots.txt could not be fetched (errors, 5xx)
+        """
         robots_url = urljoin(self.base_url, '/robots.txt')
         try:
             response = self.session.get(robots_url, timeout=self.timeout)
-            if response.status_code == 200:
-                for line in response.text.split('\n'):
-                    if line.lower().startswith('sitemap:'):
-                        sitemap_url = line.split(':', 1)[1].strip()
-                        print(f"✓ Found sitemap in robots.txt: {sitemap_url}")
-                        return sitemap_url
-        except Exception as e:
-            pass
+        except Exception:
+            return None
+
+        result = {'sitemaps': [], 'crawl_delay': None}
+        if response.status_code in (404, 410):
+            return result
+        if response.status_code != 200:
+            # Transient or unknown (e.g. 503): not an answer worth caching
+            return None
+
+        agents = []
+        in_rules = False
+        for line in response.text.split('\n'):
+            line = line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+
+            field, value = line.split(':', 1)
+            field = field.strip().lower()
+            value = value.strip()
+
+            if field == 'sitemap':
+                result['sitemaps'].append(value)
+            elif field == 'user-agent':
+                # A user-agent line after rules starts a new group
+                if in_rules:
+                    agents = []
+                    in_rules = False
+                agents.append(value)
+            else:
+                in_rules = True
+                if field == 'crawl-delay' and '*' in agents:
+                    try:
+                        result['crawl_delay'] = float(value)
+                    except ValueError:
+                        pass
 
-        print(f"⚠ No sitemap found for {self.base_url}")
+        return result
+
+    def _load_cached_discovery(self):
+        """Return cached discovery result for base_url if still fresh"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return None
+
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f).get(self.base_url)
+        except (OSError, ValueError):
+            return None
+
+        if entry and time.time() - entry.get('fetched_at', 0) < self.cache_ttl:
+            return entry
         return None
 
+    def _save_cached_discovery(self, sitemaps, crawl_delay):
+        """Store discovery result for base_url in the cache file"""
+        if not self.cache_file:
+            return
+
+        cache = {}
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = {}
+
+        cache[self.base_url] = {
+            'sitemaps': sitemaps,
+            'crawl_delay': crawl_delay,
+            'fetched_at': time.time()
+        }
+
+        directory = os.path.dirname(self.cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2)
+
     def _check_url_exists(self, url):
         """Check if URL exists (returns 200)"""
         try:
@@ -80,77 +218,192 @@ class SitemapParser:
         Returns:
             list: List of dicts with url, priority, lastmod
         """
-        try:
-            response = self.session.get(sitemap_url, timeout=self.timeout)
-            response.raise_for_status()
+        return list(self.iter_urls(sitemap_url))
 
-            # Handle gzipped sitemaps
-            content = response.content
-            if sitemap_url.endswith('.gz'):
-                content = gzip.decompress(content)
+    def iter_urls(self, sitemap_url):
+        """
+        Stream URLs from a sitemap or sitemap index
 
-            # Parse XML
-            root = ET.fromstring(content)
+        Nested sitemaps are fetched concurrently but yielded in document
+        order, so the output matches a sequential parse.
 
-            # Check if it's a sitemap index (contains other sitemaps)
-            if 'sitemapindex' in root.tag:
-                return self._parse_sitemap_index(root)
-            else:
-                return self._parse_urlset(root)
+        Args:
+            sitemap_url: URL of the sitemap
 
+        Yields:
+            dict: URL dict with url, priority, lastmod
+        """
+        child_sitemaps = []
+
+        try:
+            for kind, entry in self._stream_entries(sitemap_url):
+                if kind == 'url':
+                    yield entry
+                else:
+                    child_sitemaps.append(entry)
         except Exception as e:
             print(f"✗ Error parsing sitemap {sitemap_url}: {e}")
-            return []
+            return
 
-    def _parse_sitemap_index(self, root):
-        """Parse sitemap index (nested sitemaps)"""
-        all_urls = []
+        if child_sitemaps:
+            print(f"  Found sitemap index with {len(child_sitemaps)} sitemaps")
+            yield from self._iter_sitemap_index(child_sitemaps)
 
-        # Extract namespace
-        ns = {'ns': root.tag.split('}')[0].strip('{')} if '}' in root.tag else {}
+    def _iter_sitemap_index(self, sitemap_urls):
+        """Fetch nested sitemaps in parallel and yield their URLs in order"""
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        queues = []
 
-        # Get all sitemap locations
-        sitemap_locs = root.findall('.//ns:loc', ns) if ns else root.findall('.//loc')
+        def submit(sitemap_url):
+            q = queue.Queue(maxsize=self.queue_size)
+            executor.submit(self._stream_into_queue, sitemap_url, q, stop)
+            queues.append(q)
 
-        print(f"  Found sitemap index with {len(sitemap_locs)} sitemaps")
-
-        for loc in sitemap_locs:
-            sitemap_url = loc.text.strip()
-            print(f"  Parsing nested sitemap: {sitemap_url}")
-            urls = self.parse_sitemap(sitemap_url)
-            all_urls.extend(urls)
-
-        return all_urls
-
-    def _parse_urlset(self, root):
-        """Parse regular sitemap (urlset)"""
-        urls = []
+        try:
+            # Keep at most max_workers sitemaps in flight ahead of the reader
+            for sitemap_url in sitemap_urls[:self.max_workers]:
+                submit(sitemap_url)
+
+            for i, sitemap_url in enumerate(sitemap_urls):
+                print(f"  Parsing nested sitemap: {sitemap_url}")
+                nested = []
+
+                while True:
+                    item = queues[i].get()
+                    if item is None:
+                        break
+                    kind, entry = item
+                    if kind == 'url':
+                        yield entry
+                    else:
+                        nested.append(entry)
+
+                queues[i] = None
+                if i + self.max_workers < len(sitemap_urls):
+                    submit(sitemap_urls[i + self.max_workers])
+
+                # Index nested inside an index
+                if nested:
+                    print(f"  Found sitemap index with {len(nested)} sitemaps")
+                    yield from self._iter_sitemap_index(nested)
+        finally:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _stream_into_queue(self, sitemap_url, q, stop):
+        """Worker: stream one sitemap into a bounded queue, ending with None"""
+        def put(item):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
 
-        # Extract namespace
-        ns = {'ns': root.tag.split('}')[0].strip('{')} if '}' in root.tag else {}
+        try:
+            for item in self._stream_entries(sitemap_url):
+                if not put(item):
+                    return
+        except Exception as e:
+            print(f"✗ Error parsing sitemap {sitemap_url}: {e}")
+        put(None)
 
-        # Get all URL entries
-        url_elements = root.findall('.//ns:url', ns) if ns else root.findall('.//url')
+    def _stream_entries(self, sitemap_url):
+        """
+        Incrementally parse one sitemap document
 
-        for url_elem in url_elements:
-            loc = url_elem.find('ns:loc', ns) if ns else url_elem.find('loc')
-            if loc is None or not loc.text:
-                continue
+        Yields:
+            tuple: ('url', url_dict) for urlset entries or
+                   ('sitemap', url) for sitemap index entries
+        """
+        response = self.session.get(sitemap_url, timeout=self.timeout, stream=True)
+        try:
+            response.raise_for_status()
 
-            priority = url_elem.find('ns:priority', ns) if ns else url_elem.find('priority')
-            lastmod = url_elem.find('ns:lastmod', ns) if ns else url_elem.find('lastmod')
+            parser = ET.XMLPullParser(events=('start', 'end'))
+            decompressor = None
+            root = None
+
+            for i, chunk in enumerate(response.iter_content(chunk_size=64 * 1024)):
+                # Gzipped sitemap file (Content-Encoding is already undone by requests)
+                if i == 0 and chunk[:2] == b'\x1f\x8b':
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                if decompressor:
+                    chunk = decompressor.decompress(chunk)
+
+                parser.feed(chunk)
+                for event, elem in parser.read_events():
+                    if event == 'start':
+                        if root is None:
+                            root = elem
+                        continue
+
+                    entry = self._parse_entry(elem)
+                    if entry:
+                        yield entry
+                        # Drop parsed entries so memory stays flat
+                        root.clear()
+
+            parser.close()
+        finally:
+            response.close()
+
+    def _parse_entry(self, elem):
+        """Turn a finished <url> or <sitemap> element into an entry tuple"""
+        tag = _local_name(elem.tag)
+        if tag not in ('url', 'sitemap'):
+            return None
+
+        values = {_local_name(child.tag): (child.text or '').strip() for child in elem}
+        loc = values.get('loc')
+        if not loc:
+            return None
+
+        if tag == 'sitemap':
+            return 'sitemap', loc
+
+        return 'url', {
+            'url': loc,
+            'priority': float(values['priority']) if values.get('priority') else None,
+            'lastmod': values.get('lastmod') or None
+        }
+
+    def iter_all_urls(self, sitemap_urls=None):
+        """
+        Stream URLs from every discovered sitemap, without duplicates
 
-            urls.append({
-                'url': loc.text.strip(),
-                'priority': float(priority.text) if priority is not None and priority.text else None,
-                'lastmod': lastmod.text.strip() if lastmod is not None and lastmod.text else None
-            })
+        Args:
+            sitemap_urls: Sitemaps to read (discovered if not given)
 
-        return urls
+        Yields:
+            dict: URL dict with url, priority, lastmod
+        """
+        if sitemap_urls is None:
+            sitemap_urls = self.discover_sitemaps()
+
+        # A single sitemap needs no cross-sitemap de-duplication (and no seen-set)
+        if len(sitemap_urls) == 1:
+            yield from self.iter_urls(sitemap_urls[0])
+            return
+
+        # 64-bit fingerprints keep the seen-set far smaller than the URLs
+        seen = set()
+        for sitemap_url in sitemap_urls:
+            url_iter = self.iter_urls(sitemap_url)
+            try:
+                for url_data in url_iter:
+                    fingerprint = hash(url_data['url'])
+                    if fingerprint not in seen:
+                        seen.add(fingerprint)
+                        yield url_data
+            finally:
+                url_iter.close()
 
     def get_all_urls(self, max_urls=None):
         """
-        Discover and parse sitemap, return all URLs
+        Discover and parse sitemaps, return all URLs
 
         Args:
             max_urls: Maximum number of URLs to return
@@ -158,14 +411,20 @@ class SitemapParser:
         Returns:
             list: List of URL dicts
         """
-        sitemap_url = self.discover_sitemap()
-        if not sitemap_url:
+        sitemap_urls = self.discover_sitemaps()
+        if not sitemap_urls:
             return []
 
-        urls = self.parse_sitemap(sitemap_url)
-
-        if max_urls and len(urls) > max_urls:
-            urls = urls[:max_urls]
+        urls = []
+        url_iter = self.iter_all_urls(sitemap_urls)
+        try:
+            for url_data in url_iter:
+                urls.append(url_data)
+                # Stop fetching as soon as we have enough
+                if max_urls and len(urls) >= max_urls:
+                    break
+        finally:
+            url_iter.close()
 
         print(f"✓ Discovered {len(urls)} URLs from sitemap")
         return urls
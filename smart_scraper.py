@@ -2,18 +2,34 @@
 Smart Scraper - Automatically scrapes college websites using sitemap and filtering
 """
 import requests
-from bs4 import BeautifulSoup
 import json
-import time
 from urllib.parse import urljoin, urlparse
+import multiprocessing
 import os
-from datetime import datetime
-from html2text import HTML2Text
-
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from crawl_state import CrawlState
+from html_extractor import available_parser, extract_page
+from http_cache import CachingAdapter, ResponseCache
+from link_frontier import LinkFrontier
+from rate_limiter import HostRateLimiter
 from sitemap_parser import SitemapParser
 from url_filter import URLFilter
 
 
+def _extract_context():
+    """
+    Start method for extraction workers
+
+    Never fork: the fetch threads and open sessions are live when the pool
+    starts. forkserver is cheaper to start than spawn where available.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
 class SmartScraper:
     def __init__(self, base_url, config):
         """
@@ -26,145 +42,433 @@ class SmartScraper:
         self.base_url = base_url.rstrip('/')
         self.config = config
         self.delay = config.get('delay', 2)
-
-        # Initialize components
-        self.sitemap_parser = SitemapParser(base_url)
-        self.url_filter = URLFilter(base_url, config.get('filters', {}))
-
-        # HTML to markdown converter
-        self.html2text = HTML2Text()
-        self.html2text.ignore_links = False
-        self.html2text.ignore_images = True
-        self.html2text.ignore_emphasis = False
-        self.html2text.body_width = 0  # Don't wrap lines
-
-        # Session for requests
+        self.concurrency = max(1, int(config.get('concurrency', 1)))
+
+        # Per-host token bucket (falls back to one request per `delay` seconds)
+        rate_limit = config.get('rate_limit', {})
+        self.requests_per_second = rate_limit.get(
+            'requests_per_second', 1 / self.delay if self.delay else 0
+        )
+        self.burst = rate_limit.get('burst', 1)
+
+        # Replaying from the response cache needs no politeness delay
+        http_cache = config.get('http_cache', {})
+        self.offline = http_cache.get('offline', False)
+        if self.offline:
+            self.requests_per_second = 0
+        self.rate_limiter = HostRateLimiter(self.requests_per_second, self.burst)
+
+        # Session shared with the sitemap parser
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
 
+        # One pooled connection per worker thread, optionally behind the response cache
+        self.response_cache = None
+        pool = {'pool_connections': self.concurrency, 'pool_maxsize': self.concurrency}
+        if http_cache.get('enabled', False) or self.offline:
+            self.response_cache = ResponseCache(
+                http_cache.get('dir', 'data/http_cache'),
+                max_size_mb=http_cache.get('max_size_mb', 500)
+            )
+            adapter = CachingAdapter(self.response_cache, offline=self.offline, **pool)
+        else:
+            adapter = requests.adapters.HTTPAdapter(**pool)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # Initialize components
+        discovery = config.get('discovery', {})
+        self.sitemap_parser = SitemapParser(
+            base_url,
+            session=self.session,
+            max_workers=self.concurrency,
+            cache_file=discovery.get('cache_file', 'data/robots_cache.json'),
+            cache_ttl=discovery.get('cache_ttl', 86400)
+        )
+        self.url_filter = URLFilter(base_url, config.get('filters', {}))
+
+        # CPU-bound extraction stage (process pool fed by the fetchers)
+        extraction = config.get('extraction', {})
+        self.parser = available_parser(extraction.get('parser', 'html.parser'))
+        self.extract_workers = extraction.get('workers') or min(4, os.cpu_count() or 1)
+        self.extract_queue_size = max(1, extraction.get('queue_size', 2 * self.extract_workers))
+        self.min_words = config.get('filters', {}).get('min_words', 0)
+
+        # Incremental re-crawl state (validators + stored pages); offline
+        # replays re-extract every cached body instead, so extraction
+        # settings can be tuned against the same input
+        incremental = config.get('incremental', {})
+        self.crawl_state = None
+        if incremental.get('enabled', False) and not self.offline:
+            self.crawl_state = CrawlState(
+                incremental.get('state_file', 'data/crawl_state.json'),
+                settings={'parser': self.parser, 'min_words': self.min_words}
+            )
+
+        self.stats = {'fetched': 0, 'not_modified': 0, 'unchanged': 0, 'bytes': 0}
+        self.stats_lock = threading.Lock()
+
         self.scraped_pages = []
+        self.page_count = 0
+        self.word_count = 0
+
+    def _count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] += amount
 
     def discover_urls(self):
         """
         Discover URLs using configured strategies
 
+        Sitemap URLs are streamed straight through the filter into a
+        bounded top-k heap, so only max_pages candidates are held at once.
+
         Returns:
             list: List of prioritized URLs
         """
         strategies = self.config.get('strategies', {})
-        all_urls = []
 
         # Strategy 1: Sitemap
         if strategies.get('try_sitemap', True):
             print("\n🔍 Strategy 1: Discovering URLs from sitemap...")
-            sitemap_urls = self.sitemap_parser.get_all_urls()
-            if sitemap_urls:
-                all_urls.extend(sitemap_urls)
-                print(f"✓ Found {len(sitemap_urls)} URLs from sitemap")
+            sitemap_urls = self.sitemap_parser.discover_sitemaps()
+            self._apply_crawl_delay(self.sitemap_parser.crawl_delay)
 
-        # Filter URLs
-        if all_urls:
-            print(f"\n🔧 Filtering URLs...")
-            filtered = self.url_filter.filter_urls(all_urls)
-            print(f"✓ {len(filtered)}/{len(all_urls)} URLs passed filters")
+            if sitemap_urls:
+                print(f"\n🔧 Filtering and prioritizing URLs...")
+                stats = {}
+                max_pages = self.config.get('max_pages', 100)
+                prioritized = self.url_filter.top_urls(
+                    self.sitemap_parser.iter_all_urls(sitemap_urls), max_pages, stats=stats
+                )
 
-            # Prioritize
-            max_pages = self.config.get('max_pages', 100)
-            prioritized = self.url_filter.prioritize_urls(filtered, max_pages)
-            print(f"✓ Selected top {len(prioritized)} URLs by priority")
+                print(f"✓ Found {stats.get('seen', 0)} URLs from sitemap")
+                print(f"✓ {stats.get('passed', 0)}/{stats.get('seen', 0)} URLs passed filters")
+                print(f"✓ Selected top {len(prioritized)} URLs by priority")
 
-            return prioritized
+                return prioritized
 
         return []
 
-    def scrape_page(self, url):
+    def _apply_crawl_delay(self, crawl_delay):
+        """Slow down to the robots.txt Crawl-delay if it is stricter than our rate"""
+        if not crawl_delay or self.offline:
+            return
+
+        rate = 1 / crawl_delay
+        if self.requests_per_second <= 0 or rate < self.requests_per_second:
+            host = urlparse(self.base_url).netloc
+            self.rate_limiter.set_rate(host, rate)
+            print(f"⏱ robots.txt Crawl-delay: {crawl_delay:g}s (limiting {host} to {rate:g} req/s)")
+
+    def _fetch_url(self, url_data):
         """
-        Scrape a single page
+        Fetch a discovered URL (network stage of the pipeline)
 
         Args:
-            url: URL to scrape
+            url_data: URL dict with 'url' and optional 'lastmod'
 
         Returns:
-            dict: Page data or None if failed
+            dict: {'page': ...} when a stored page can be reused, the raw
+                  response fields for extraction otherwise, or None on error
         """
+        url = url_data['url']
+        lastmod = url_data.get('lastmod')
+
+        if self.crawl_state and self.crawl_state.is_unchanged(url, lastmod):
+            self._count('unchanged')
+            print(f"  ↺ Unchanged since {lastmod}: {url}")
+            return self._reuse(url)
+
         try:
-            response = self.session.get(url, timeout=10)
+            headers = self.crawl_state.conditional_headers(url) if self.crawl_state else {}
+
+            self.rate_limiter.wait(url)
+            response = self.session.get(url, headers=headers, timeout=10)
+
+            # Not modified since last run - reuse the stored page
+            if response.status_code == 304 and self.crawl_state:
+                entry = self.crawl_state.get(url)
+                if self.crawl_state.get_page(url):
+                    self._count('not_modified')
+                    print(f"  ↺ Not modified: {url}")
+                    reused = self._reuse(url)
+                    # Keep the new sitemap lastmod so the next run skips the request
+                    self._record({
+                        'url': url,
+                        'etag': response.headers.get('ETag') or entry.get('etag'),
+                        'last_modified': response.headers.get('Last-Modified') or entry.get('last_modified'),
+                        'lastmod': lastmod,
+                        'content_hash': entry.get('content_hash')
+                    }, reused['page'], reused['links'])
+                    return reused
+
             response.raise_for_status()
+            self._count('fetched')
+            self._count('bytes', len(response.content))
+
+            fetched = {
+                'url': url,
+                'html': response.content,
+                'encoding': response.encoding,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'lastmod': lastmod,
+                'content_hash': None
+            }
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            if self.crawl_state:
+                # Same bytes as last run (server sent no validators) - skip parsing
+                fetched['content_hash'] = CrawlState.content_hash(response.content)
+                entry = self.crawl_state.get(url)
+                if self.crawl_state.get_page(url) and entry.get('content_hash') == fetched['content_hash']:
+                    reused = self._reuse(url)
+                    self._record(fetched, reused['page'], reused['links'])
+                    print(f"  ↺ Unchanged content: {url}")
+                    return reused
 
-            # Remove unwanted elements
-            for element in soup(['script', 'style', 'nav', 'footer', 'header', 'iframe', 'noscript']):
-                element.decompose()
+            return fetched
 
-            # Get title
-            title = soup.title.string if soup.title else urlparse(url).path
+        except Exception as e:
+            print(f"  ✗ Error scraping {url}: {e}")
+            return None
 
-            # Convert to markdown
-            markdown_content = self.html2text.handle(str(soup))
+    def _reuse(self, url):
+        """Stored page and links from crawl state, in _fetch_url's result shape"""
+        return {'page': self.crawl_state.get_page(url), 'links': self.crawl_state.get_links(url)}
 
-            # Clean up markdown
-            markdown_content = '\n'.join([
-                line for line in markdown_content.split('\n')
-                if line.strip() and not line.strip().startswith('#####')
-            ])
+    def _extract_args(self, fetched, find_links=False):
+        """Positional arguments for html_extractor.extract_page"""
+        return (fetched['url'], fetched['html'], fetched['encoding'],
+                self.parser, self.min_words, find_links)
 
-            # Count words
-            word_count = len(markdown_content.split())
+    def _finish_page(self, fetched, page, word_count, links):
+        """Report an extracted page and record it in crawl state"""
+        url = fetched['url']
+        if page is None:
+            print(f"  ⊘ Skipped (only {word_count} words): {url}")
+            return None
 
-            # Check minimum words
-            min_words = self.config.get('filters', {}).get('min_words', 0)
-            if word_count < min_words:
-                print(f"  ⊘ Skipped (only {word_count} words): {url}")
-                return None
+        print(f"  ✓ Scraped ({word_count} words): {url}")
+        self._record(fetched, page, links)
+        return page
+
+    def _record(self, fetched, page, links=None):
+        if self.crawl_state:
+            self.crawl_state.record(
+                fetched['url'], page,
+                etag=fetched['etag'],
+                last_modified=fetched['last_modified'],
+                lastmod=fetched['lastmod'],
+                content_hash=fetched['content_hash'],
+                links=links
+            )
+
+    def scrape_page(self, url, lastmod=None):
+        """
+        Scrape a single page (fetch and extract in the calling thread)
 
-            print(f"  ✓ Scraped ({word_count} words): {url}")
+        Args:
+            url: URL to scrape
+            lastmod: Sitemap <lastmod> value, recorded in crawl state
 
-            return {
-                'url': url,
-                'title': title.strip() if title else url,
-                'content': markdown_content.strip(),
-                'word_count': word_count,
-                'scraped_at': datetime.now().isoformat()
-            }
+        Returns:
+            dict: Page data or None if failed
+        """
+        fetched = self._fetch_url({'url': url, 'lastmod': lastmod})
+        if fetched is None or 'page' in fetched:
+            return fetched and fetched['page']
 
+        try:
+            page, word_count, links = extract_page(*self._extract_args(fetched))
+            return self._finish_page(fetched, page, word_count, links)
         except Exception as e:
             print(f"  ✗ Error scraping {url}: {e}")
             return None
 
-    def scrape_all(self):
+    def _iter_pipeline(self, next_url, on_links=None):
+        """
+        Fetch URLs on a thread pool and extract them on a process pool
+
+        New fetches are only started while the extraction stage has room
+        (extraction.queue_size), so a slow extraction stage throttles the
+        fetchers instead of buffering the whole site in memory.
+
+        Args:
+            next_url: Callable returning the next URL dict, or None when
+                      nothing is available right now
+            on_links: Optional callback(url_data, links) for each finished
+                      page; it may make more URLs available to next_url
+
+        Yields:
+            tuple: (url_data, page or None) in the order URLs were taken
+        """
+        events = queue.Queue()
+        url_datas = {}
+        results = {}
+        fetching = 0
+        extracting = 0
+        submitted = 0
+        next_index = 0
+        find_links = on_links is not None
+
+        def fetch(i, url_data):
+            fetched = None
+            try:
+                fetched = self._fetch_url(url_data)
+            finally:
+                events.put(('fetched', i, fetched))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as fetchers, \
+                ProcessPoolExecutor(max_workers=self.extract_workers, mp_context=_extract_context()) as extractors:
+            while True:
+                # Top up the fetchers while the extraction stage has room
+                while fetching < self.concurrency and extracting < self.extract_queue_size:
+                    url_data = next_url()
+                    if url_data is None:
+                        break
+                    url_datas[submitted] = url_data
+                    fetchers.submit(fetch, submitted, url_data)
+                    submitted += 1
+                    fetching += 1
+
+                if fetching == 0 and extracting == 0:
+                    break
+
+                kind, i, value = events.get()
+                if kind == 'fetched':
+                    fetching -= 1
+                    if value is None or 'page' in value:
+                        results[i] = (value and value['page'], value['links'] if value else [])
+                    else:
+                        future = extractors.submit(extract_page, *self._extract_args(value, find_links))
+                        future.add_done_callback(
+                            lambda f, i=i, fetched=value: events.put(('extracted', i, (fetched, f)))
+                        )
+                        extracting += 1
+                    if i not in results:
+                        continue
+                else:
+                    extracting -= 1
+                    fetched, future = value
+                    try:
+                        page, word_count, links = future.result()
+                        results[i] = (self._finish_page(fetched, page, word_count, links), links)
+                    except Exception as e:
+                        print(f"  ✗ Error scraping {fetched['url']}: {e}")
+                        results[i] = (None, [])
+
+                if on_links:
+                    on_links(url_datas[i], results[i][1])
+
+                # Emit everything that is ready, in the order URLs were taken
+                while next_index in results:
+                    page, _ = results.pop(next_index)
+                    yield url_datas.pop(next_index), page
+                    next_index += 1
+
+    def _crawl_links(self):
+        """
+        Strategy 2: follow same-domain links from the homepage
+
+        Discovery and scraping overlap - links from each finished page go
+        straight into the frontier that feeds the fetchers.
+
+        Returns:
+            tuple: (next_url, on_links) callables for _iter_pipeline
+        """
+        crawl = self.config.get('crawl', {})
+        frontier = LinkFrontier(
+            self.url_filter,
+            max_depth=crawl.get('max_depth', 3),
+            max_pages=self.config.get('max_pages', 100),
+            max_size=crawl.get('max_frontier', 10000)
+        )
+        frontier.add(self.base_url + '/', depth=0)
+
+        def on_links(url_data, links):
+            frontier.add_links(links, url_data['depth'] + 1)
+
+        print(f"   Max depth: {frontier.max_depth}, max pages: {frontier.max_pages}")
+        return frontier.next_url, on_links
+
+    def scrape_all(self, sink=None, skip_urls=None):
         """
         Scrape all discovered URLs
 
+        Args:
+            sink: Optional JSONLWriter; pages are written as soon as they are
+                  scraped instead of being kept in self.scraped_pages
+            skip_urls: URLs already scraped by an earlier run (resume)
+
         Returns:
-            list: List of scraped pages
+            list: List of scraped pages (empty when writing to a sink)
         """
+        skip_urls = skip_urls or set()
+
         # Discover URLs
         urls = self.discover_urls()
-
-        if not urls:
+        on_links = None
+
+        if urls:
+            if skip_urls:
+                urls = [url_data for url_data in urls if url_data['url'] not in skip_urls]
+                print(f"↻ Resuming: {len(skip_urls)} pages already saved, {len(urls)} left")
+            url_iter = iter(urls)
+            next_url = lambda: next(url_iter, None)
+            total = len(urls)
+        elif self.config.get('strategies', {}).get('follow_links', False):
+            # Saved pages are still fetched so their links reach the frontier
+            print("\n🔍 Strategy 2: Following links from the homepage...")
+            next_url, on_links = self._crawl_links()
+            total = self.config.get('max_pages', 100)
+        else:
             print("\n❌ No URLs discovered!")
             return []
 
-        print(f"\n📥 Scraping {len(urls)} pages...")
-        print(f"⏱ Delay between requests: {self.delay}s\n")
+        print(f"\n📥 Scraping up to {total} pages...")
+        print(f"⚡ Concurrency: {self.concurrency} fetchers, {self.extract_workers} extractors ({self.parser})")
+        print(f"⏱ Rate limit: {self.requests_per_second:g} req/s per host (burst {self.burst})\n")
+
+        attempted = 0
+        hub_pages = 0
+        for url_data, page_data in self._iter_pipeline(next_url, on_links):
+            attempted += 1
+            if not page_data or page_data['url'] in skip_urls:
+                continue
+            # Link crawls fetch hub pages for their links only; like sitemap
+            # URLs, a page is kept only if it passes the full filter
+            if on_links and not self.url_filter.is_valid_url(page_data['url']):
+                hub_pages += 1
+                continue
+
+            page_data['priority_score'] = url_data['score']
+            self.page_count += 1
+            self.word_count += page_data['word_count']
+
+            if sink:
+                sink.write(page_data)
+            else:
+                self.scraped_pages.append(page_data)
 
-        for i, url_data in enumerate(urls, 1):
-            url = url_data['url']
-            print(f"[{i}/{len(urls)}]", end=" ")
+        print(f"\n✅ Successfully scraped {self.page_count}/{attempted} pages")
+        if hub_pages:
+            print(f"🔗 Followed links on {hub_pages} pages that did not pass the filters")
+        print(f"📡 Downloaded {self.stats['fetched']} pages ({self.stats['bytes'] / (1024 * 1024):.2f} MB)")
 
-            page_data = self.scrape_page(url)
-            if page_data:
-                page_data['priority_score'] = url_data['score']
-                self.scraped_pages.append(page_data)
+        if self.response_cache:
+            cache = self.response_cache
+            mode = "replayed" if self.offline else "recorded"
+            print(f"🗄 HTTP cache {mode}: {cache.hits} hits, {cache.misses} misses "
+                  f"({cache.size() / (1024 * 1024):.2f} MB on disk)")
 
-            # Rate limiting
-            if i < len(urls):
-                time.sleep(self.delay)
+        if self.crawl_state:
+            print(f"↺ Reused {self.stats['unchanged']} unchanged (sitemap lastmod) "
+                  f"and {self.stats['not_modified']} not modified (HTTP 304)")
+            self.crawl_state.save()
 
-        print(f"\n✅ Successfully scraped {len(self.scraped_pages)}/{len(urls)} pages")
         return self.scraped_pages
 
     def save_to_file(self, output_file):
@@ -199,8 +503,36 @@ if __name__ == "__main__":
         'base_url': 'https://www.bharaticollege.du.ac.in/',
         'max_pages': 150,
         'delay': 2,
+        'concurrency': 4,
+        'rate_limit': {
+            'requests_per_second': 2,
+            'burst': 4
+        },
         'strategies': {
-            'try_sitemap': True
+            'try_sitemap': True,
+            'follow_links': True
+        },
+        'crawl': {
+            'max_depth': 3,
+            'max_frontier': 10000
+        },
+        'extraction': {
+            'parser': 'lxml',
+            'workers': 4,
+            'queue_size': 8
+        },
+        'discovery': {
+            'cache_file': 'data/robots_cache.json',
+            'cache_ttl': 86400
+        },
+        'incremental': {
+            'enabled': True,
+            'state_file': 'data/crawl_state.json'
+        },
+        'http_cache': {
+            'enabled': True,
+            'dir': 'data/http_cache',
+            'max_size_mb': 500
         },
         'filters': {
             'include_keywords': [
@@ -0,0 +1,115 @@
+"""
+Token Budget - Counts embedding-model tokens so chunks fill the model's input window
+"""
+import re
+
+# Units end after a sentence end ('. ', '!\n', ...) or a line break, so they
+# always split on whitespace and their token counts add up exactly
+_UNIT_END_RE = re.compile(r'[.!?][ \n]|\n')
+_WORD_END_RE = re.compile(r'\s+')
+
+
+def load_token_counter(model_name, max_tokens=256):
+    """
+    Return a TokenCounter, or None if transformers or the tokenizer is unavailable
+
+    Args:
+        model_name: Hugging Face tokenizer name (the embedding model's)
+        max_tokens: Model input limit, including special tokens
+
+    Returns:
+        TokenCounter or None
+    """
+    try:
+        from transformers import AutoTokenizer
+    except ImportError:
+        print("⚠ transformers is not installed, falling back to character chunks")
+        return None
+
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+    except OSError as e:
+        print(f"⚠ Could not load tokenizer {model_name} ({e}), falling back to character chunks")
+        return None
+    return TokenCounter(tokenizer, max_tokens)
+
+
+class TokenCounter:
+    def __init__(self, tokenizer, max_tokens=256, cache_size=100000):
+        """
+        Initialize token counter
+
+        Args:
+            tokenizer: Hugging Face tokenizer of the embedding model
+            max_tokens: Model input limit, including special tokens
+            cache_size: Counted units remembered (menus and footers repeat a lot)
+        """
+        self.tokenizer = tokenizer
+        self.budget = max_tokens - tokenizer.num_special_tokens_to_add()
+        self.cache_size = cache_size
+        self.cache = {}
+
+    def count(self, texts):
+        """
+        Token counts for texts, tokenizing only uncached ones in a single batch
+
+        Args:
+            texts: List of strings
+
+        Returns:
+            list: Token count per text (without special tokens)
+        """
+        missing = list({text for text in texts if text not in self.cache})
+        if missing:
+            if len(self.cache) + len(missing) > self.cache_size:
+                self.cache.clear()
+            encoded = self.tokenizer(missing, add_special_tokens=False)['input_ids']
+            self.cache.update(zip(missing, map(len, encoded)))
+        return [self.cache[text] for text in texts]
+
+    def units(self, text):
+        """
+        Split text into sentence/line spans that each fit the budget
+
+        Args:
+            text: Text to split
+
+        Returns:
+            list: (start, end, tokens) spans covering text in order
+        """
+        bounds = [0] + [match.end() for match in _UNIT_END_RE.finditer(text)]
+        if bounds[-1] != len(text):
+            bounds.append(len(text))
+        spans = [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+        units = []
+        for (start, end), tokens in zip(spans, self.count([text[s:e] for s, e in spans])):
+            if tokens <= self.budget:
+                units.append((start, end, tokens))
+            else:
+                units.extend(self._split_long(text, start, end))
+        return units
+
+    def _split_long(self, text, start, end):
+        """Split an over-budget unit at word boundaries, or inside a word if it must"""
+        bounds = [start] + [start + match.end() for match in _WORD_END_RE.finditer(text[start:end])]
+        if bounds[-1] != end:
+            bounds.append(end)
+        spans = [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+        units = []
+        for (s, e), tokens in zip(spans, self.count([text[s:e] for s, e in spans])):
+            if tokens <= self.budget:
+                units.append((s, e, tokens))
+                continue
+
+            # A single huge "word" (long URL, base64 blob): cut at token offsets.
+            # Mid-word cuts may shift a token or two, so leave some headroom.
+            offsets = self.tokenizer(text[s:e], add_special_tokens=False,
+                                     return_offsets_mapping=True)['offset_mapping']
+            step = max(1, self.budget - 8)
+            cuts = [s] + [s + offsets[i][0] for i in range(step, len(offsets), step)] + [e]
+            pieces = list(zip(cuts, cuts[1:]))
+            units.extend((ps, pe, tokens) for (ps, pe), tokens
+                         in zip(pieces, self.count([text[ps:pe] for ps, pe in pieces])))
+        return units
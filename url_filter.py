@@ -1,14 +1,78 @@
 """
 URL Filter - Filters and prioritizes URLs for college websites
 """
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse, urljoin, urlunparse
+import heapq
 import re
 
+
+def normalize_url(url):
+    """
+    Normalize URL for de-duplication
+
+    Lowercases scheme and host, drops the fragment and default ports, and
+    turns an empty path into '/'.
+
+    Args:
+        url: Absolute URL
+
+    Returns:
+        str: Normalized URL
+    """
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+
+    if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+        netloc = netloc.rsplit(':', 1)[0]
+
+    return urlunparse((scheme, netloc, parsed.path or '/', parsed.params, parsed.query, ''))
+
+
+# Scheme, netloc and path of an absolute URL (what urlparse would return)
+_URL_PARTS_RE = re.compile(r'^[A-Za-z][A-Za-z0-9+.\-]*://([^/?#]*)([^?#]*)')
+
+DEFAULT_PRIORITY_KEYWORDS = {
+    'high': ['admission', 'course', 'program', 'department', 'fee'],
+    'medium': ['faculty', 'research', 'facility', 'infrastructure', 'placement'],
+    'low': ['event', 'news', 'gallery', 'notice']
+}
+
+PRIORITY_POINTS = {'high': 20, 'medium': 10}  # any other level: 5
+
+
+def _compile_keywords(keywords):
+    """Combine substring keywords into one regex (None if there are none)"""
+    if not keywords:
+        return None
+    return re.compile('|'.join(re.escape(keyword) for keyword in sorted(set(keywords))))
+
+
+def _url_parts(url):
+    """Return (netloc, path) like urlparse, without building a ParseResult"""
+    match = _URL_PARTS_RE.match(url)
+    if not match:
+        parsed = urlparse(url)
+        return parsed.netloc, parsed.path
+
+    path = match.group(2)
+    # urlparse splits ;params off the last path segment
+    if ';' in path:
+        semicolon = path.find(';', path.rfind('/'))
+        if semicolon != -1:
+            path = path[:semicolon]
+    return match.group(1), path
+
+
 class URLFilter:
     def __init__(self, base_url, config):
         """
         Initialize URL filter
 
+        Keyword lists are compiled once here into combined regexes, so each
+        URL costs one lowercase and a few regex scans however long the
+        lists are.
+
         Args:
             base_url: Base URL of website
             config: Configuration dict with filters
@@ -17,41 +81,90 @@ class URLFilter:
         self.base_domain = urlparse(base_url).netloc
         self.config = config
 
-    def is_valid_url(self, url):
-        """
-        Check if URL should be scraped
-
-        Args:
-            url: URL to check
+        self.exclude_extensions = tuple(config.get('exclude_extensions', []))
+        self.exclude_re = _compile_keywords(config.get('exclude_keywords', []))
+        self.include_re = _compile_keywords(config.get('include_keywords', []))
 
-        Returns:
-            bool: True if URL should be scraped
-        """
-        parsed = urlparse(url)
+        priority_keywords = config.get('priority_keywords', DEFAULT_PRIORITY_KEYWORDS)
+        self.priority_tiers = [
+            (_compile_keywords(keywords), PRIORITY_POINTS.get(level, 5))
+            for level, keywords in priority_keywords.items()
+            if keywords
+        ]
 
+    def _is_crawlable(self, netloc, url_lower):
         # Must be same domain
-        if parsed.netloc != self.base_domain:
+        if netloc != self.base_domain:
             return False
 
         # Check excluded extensions
-        exclude_ext = self.config.get('exclude_extensions', [])
-        if any(url.lower().endswith(ext) for ext in exclude_ext):
+        if self.exclude_extensions and url_lower.endswith(self.exclude_extensions):
             return False
 
         # Check excluded keywords
-        exclude_keywords = self.config.get('exclude_keywords', [])
-        url_lower = url.lower()
-        if any(keyword in url_lower for keyword in exclude_keywords):
+        if self.exclude_re and self.exclude_re.search(url_lower):
+            return False
+
+        return True
+
+    def _is_valid(self, netloc, url_lower):
+        if not self._is_crawlable(netloc, url_lower):
             return False
 
         # Check included keywords (if specified)
-        include_keywords = self.config.get('include_keywords', [])
-        if include_keywords:
-            if not any(keyword in url_lower for keyword in include_keywords):
-                return False
+        if self.include_re and not self.include_re.search(url_lower):
+            return False
 
         return True
 
+    def _score(self, path, url_lower, sitemap_priority, depth):
+        score = 0.0
+
+        # Base score from sitemap
+        if sitemap_priority is not None:
+            score += sitemap_priority * 50
+
+        # Homepage gets high priority
+        if path.lower() in ('/', '/index.html', '/home/'):
+            score += 30
+
+        # Keyword matching (each level counts once)
+        for pattern, points in self.priority_tiers:
+            if pattern.search(url_lower):
+                score += points
+
+        # Depth penalty (deeper = less important)
+        score -= depth * 5
+
+        return max(score, 0.0)
+
+    def is_crawlable(self, url):
+        """
+        Check if URL may be fetched at all (same domain, not excluded)
+
+        Unlike is_valid_url, include_keywords are not required, so a link
+        crawl can pass through hub pages such as the homepage.
+
+        Args:
+            url: URL to check
+
+        Returns:
+            bool: True if URL may be fetched
+        """
+        return self._is_crawlable(_url_parts(url)[0], url.lower())
+
+    def is_valid_url(self, url):
+        """
+        Check if URL should be scraped
+
+        Args:
+            url: URL to check
+
+        Returns:
+            bool: True if URL should be scraped
+        """
+        return self._is_valid(_url_parts(url)[0], url.lower())
+
     def filter_urls(self, urls):
         """
         Filter list of URLs
@@ -82,75 +195,103 @@ class URLFilter:
         Returns:
             float: Priority score (higher = more important)
         """
-        score = 0.0
+        return self._score(_url_parts(url)[1], url.lower(), sitemap_priority, depth)
 
-        # Base score from sitemap
-        if sitemap_priority is not None:
-            score += sitemap_priority * 50
+    def _iter_scored(self, urls, check_valid=True, stats=None):
+        """
+        Filter and score URLs lazily
 
-        parsed = urlparse(url)
-        path = parsed.path.lower()
-        url_lower = url.lower()
+        Yields:
+            tuple: (-score, url, seq, sitemap_priority, lastmod) - sorts best
+                   first, ties broken by URL so runs are reproducible
+        """
+        for seq, url_data in enumerate(urls):
+            if isinstance(url_data, str):
+                url, sitemap_priority, lastmod = url_data, None, None
+            else:
+                url = url_data.get('url')
+                sitemap_priority = url_data.get('priority')
+                lastmod = url_data.get('lastmod')
+
+            if stats is not None:
+                stats['seen'] = stats.get('seen', 0) + 1
+            if not url:
+                continue
+
+            netloc, path = _url_parts(url)
+            url_lower = url.lower()
+            if check_valid and not self._is_valid(netloc, url_lower):
+                continue
+
+            if stats is not None:
+                stats['passed'] = stats.get('passed', 0) + 1
+
+            score = self._score(path, url_lower, sitemap_priority, 0)
+            yield -score, url, seq, sitemap_priority, lastmod
+
+    @staticmethod
+    def _scored_dict(entry):
+        neg_score, url, _, sitemap_priority, lastmod = entry
+        return {
+            'url': url,
+            'score': -neg_score,
+            'sitemap_priority': sitemap_priority,
+            'lastmod': lastmod
+        }
 
-        # Homepage gets high priority
-        if path in ['/', '/index.html', '/home/']:
-            score += 30
+    def score_urls(self, urls, check_valid=True):
+        """
+        Filter and score URLs in a single pass
 
-        # Keyword matching
-        priority_keywords = self.config.get('priority_keywords', {
-            'high': ['admission', 'course', 'program', 'department', 'fee'],
-            'medium': ['faculty', 'research', 'facility', 'infrastructure', 'placement'],
-            'low': ['event', 'news', 'gallery', 'notice']
-        })
-        for priority_level, keywords in priority_keywords.items():
-            for keyword in keywords:
-                if keyword in url_lower:
-                    if priority_level == 'high':
-                        score += 20
-                    elif priority_level == 'medium':
-                        score += 10
-                    else:  # low
-                        score += 5
-                    break  # Count each keyword level once
+        Each URL is lowercased and split once for both the filter checks and
+        the priority score.
 
-        # Depth penalty (deeper = less important)
-        score -= depth * 5
+        Args:
+            urls: Iterable of URL strings or dicts with 'url', 'priority', 'lastmod'
+            check_valid: Drop URLs that fail is_valid_url
 
-        return max(score, 0.0)
+        Returns:
+            list: Scored URL dicts (url, score, sitemap_priority, lastmod) in input order
+        """
+        return [self._scored_dict(entry) for entry in self._iter_scored(urls, check_valid)]
 
-    def prioritize_urls(self, urls, max_urls=None):
+    def top_urls(self, urls, max_urls=None, check_valid=True, stats=None):
         """
-        Sort URLs by priority and optionally limit
+        Filter, score and select the best URLs in one streaming pass
+
+        With max_urls set, only a bounded heap of max_urls candidates is
+        kept, so memory and time scale with max_urls rather than with the
+        number of URLs in the input (e.g. a streaming sitemap parser).
 
         Args:
-            urls: List of URL dicts with 'url', 'priority', etc.
+            urls: Iterable of URL strings or dicts with 'url', 'priority', 'lastmod'
             max_urls: Maximum number of URLs to return
+            check_valid: Drop URLs that fail is_valid_url
+            stats: Optional dict that receives 'seen' and 'passed' counts
 
         Returns:
-            list: Prioritized URLs
+            list: Scored URL dicts, highest score first, ties by URL
         """
-        # Calculate scores
-        scored_urls = []
-        for url_data in urls:
-            url = url_data if isinstance(url_data, str) else url_data.get('url')
-            sitemap_priority = None if isinstance(url_data, str) else url_data.get('priority')
-
-            score = self.calculate_priority(url, sitemap_priority)
+        candidates = self._iter_scored(urls, check_valid, stats)
+        if max_urls:
+            selected = heapq.nsmallest(max_urls, candidates)
+        else:
+            selected = sorted(candidates)
 
-            scored_urls.append({
-                'url': url,
-                'score': score,
-                'sitemap_priority': sitemap_priority
-            })
+        return [self._scored_dict(entry) for entry in selected]
 
-        # Sort by score (descending)
-        scored_urls.sort(key=lambda x: x['score'], reverse=True)
+    def prioritize_urls(self, urls, max_urls=None):
+        """
+        Sort URLs by priority and optionally limit
 
-        # Limit if specified
-        if max_urls:
-            scored_urls = scored_urls[:max_urls]
+        Args:
+            urls: List (or iterable) of URL dicts with 'url', 'priority', etc.
+            max_urls: Maximum number of URLs to return
 
-        return scored_urls
+        Returns:
+            list: Prioritized URLs
+        """
+        return self.top_urls(urls, max_urls, check_valid=False)
 
 
 if __name__ == "__main__":
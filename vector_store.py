@@ -0,0 +1,117 @@
+"""
+Vector Store - Binary embedding matrix (memory-mappable) with a JSON sidecar for chunks
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+# Header: magic, format version, dtype code, rows, dim; padded so the
+# matrix starts on a 32-byte boundary (Float32Array needs a multiple of 4)
+MAGIC = b'EMBV'
+VERSION = 1
+HEADER_SIZE = 32
+_HEADER = struct.Struct('<4sHHII')
+_DTYPES = {0: np.dtype('<f4'), 1: np.dtype('<f2')}
+_DTYPE_CODES = {'float32': 0, 'float16': 1}
+
+
+def sidecar_path(store_file):
+    """Chunks and metadata file next to the matrix (data/embeddings.bin -> data/embeddings.chunks.json)"""
+    return os.path.splitext(store_file)[0] + '.chunks.json'
+
+
+def write_vector_store(store_file, chunks, embeddings, info=None, dtype='float32'):
+    """
+    Write the embedding matrix and its sidecar atomically
+
+    Args:
+        store_file: Matrix path (e.g. data/embeddings.bin)
+        chunks: Chunk dicts, one per row
+        embeddings: (rows, dim) array or list of vectors
+        info: Extra sidecar fields (model, backend, normalized, ...)
+        dtype: 'float32' or 'float16' (half the size, ~3 significant digits)
+
+    Returns:
+        tuple: (matrix bytes, sidecar bytes)
+    """
+    if dtype not in _DTYPE_CODES:
+        raise ValueError(f"Unsupported dtype: {dtype}")
+    code = _DTYPE_CODES[dtype]
+
+    matrix = np.asarray(embeddings, dtype=_DTYPES[code])
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(chunks), -1)
+    if len(matrix) != len(chunks):
+        raise ValueError(f"{len(chunks)} chunks but {len(matrix)} embeddings")
+
+    directory = os.path.dirname(store_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    header = _HEADER.pack(MAGIC, VERSION, code, matrix.shape[0], matrix.shape[1])
+    tmp_file = store_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        f.write(np.ascontiguousarray(matrix).tobytes())
+
+    sidecar = dict(info or {}, dtype=dtype, count=len(chunks),
+                   embedding_dim=matrix.shape[1], chunks=chunks)
+    sidecar_file = sidecar_path(store_file)
+    with open(sidecar_file + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(sidecar, f, ensure_ascii=False)
+
+    # Matrix first: a sidecar never describes a matrix that is not there yet
+    os.replace(tmp_file, store_file)
+    os.replace(sidecar_file + '.tmp', sidecar_file)
+    return os.path.getsize(store_file), os.path.getsize(sidecar_file)
+
+
+def read_vectors(store_file, mmap=True):
+    """
+    Read the embedding matrix
+
+    Args:
+        store_file: Matrix path
+        mmap: Map the file read-only instead of reading it into memory
+
+    Returns:
+        np.ndarray: (rows, dim) matrix, float32 or float16 as stored
+    """
+    with open(store_file, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or header[:4] != MAGIC:
+        raise ValueError(f"Not an embedding store: {store_file}")
+
+    _, version, code, rows, dim = _HEADER.unpack_from(header)
+    if version != VERSION or code not in _DTYPES:
+        raise ValueError(f"Unsupported embedding store (version {version}, dtype {code}): {store_file}")
+
+    dtype = _DTYPES[code]
+    if rows == 0:
+        return np.zeros((0, dim), dtype=dtype)
+    if mmap:
+        return np.memmap(store_file, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(rows, dim))
+    with open(store_file, 'rb') as f:
+        f.seek(HEADER_SIZE)
+        return np.fromfile(f, dtype=dtype, count=rows * dim).reshape(rows, dim)
+
+
+def read_vector_store(store_file, mmap=True):
+    """
+    Read the embedding matrix and its sidecar
+
+    Args:
+        store_file: Matrix path
+        mmap: Map the matrix instead of reading it
+
+    Returns:
+        tuple: (matrix, sidecar dict with 'chunks' and the info fields)
+    """
+    vectors = read_vectors(store_file, mmap=mmap)
+    with open(sidecar_path(store_file), 'r', encoding='utf-8') as f:
+        sidecar = json.load(f)
+    if sidecar.get('count') != len(vectors):
+        raise ValueError(f"Sidecar describes {sidecar.get('count')} chunks, matrix has {len(vectors)}: {store_file}")
+    return vectors, sidecar